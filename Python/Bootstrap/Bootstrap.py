@@ -1,7 +1,6 @@
 import os
 import sys
 import datetime
-from dateutil import relativedelta
 import numpy as np
 import pandas as pd
 
@@ -13,35 +12,103 @@ if __name__ == '__main__':
 
 from yearfracion import yearfrac
 
+if __name__ == '__main__':
+    from curve_lookup import CurveLookup
+else:
+    from .curve_lookup import CurveLookup
+
 class Bootstrap:
     """
     Bootstrap class to perform bootstrapping on a dataset of OIS rates
     """
 
-    def __init__(self, data):
+    def __init__(self, data, holidays:np.ndarray = None, roll:str = 'following', store = None):
         """
         Constructor for the Bootstrap class
         :param data: pandas DataFrame containing the OIS rates
+        :param holidays: non-trading days used to move the dates to business days (e.g. the
+            TARGET calendar from eur_calendar()). Default is only weekends.
+        :param roll: business day convention, 'following' or 'modifiedfollowing'
+        :param store: optional CurveStore, the curves are reopened from it if they were already
+            bootstrapped from the same data, otherwise they are bootstrapped and saved in it
         """
 
         # keep the original data
         self.__OIS_data = data
 
+        # business day calendar
+        self.__holidays = np.asarray(holidays if holidays is not None else [], dtype='datetime64[D]')
+        self.__roll = roll
+
         # structures to hold the computed values
         self.__dates = None
         self.__yf_30_360 = None
         self.__yf_365 = None
         self.__discount_factors = None
         self.__zero_rates = None
+        # cache of the interpolated rates, keyed by the target dates and expiries
+        self.__interpolated = {}
+        # indexed access to the curve
+        self.__lookup = None
+
+        # on-disk store of the curves
+        self.__store = store
 
         t0 = datetime.datetime.now()
-        self.__bootstrap()
+        if not self.__load():
+            self.__bootstrap()
+            self.__save()
         t1 = datetime.datetime.now()
         print(f'Time taken to bootstrap the data: {(t1 - t0).total_seconds()} s')
+
+    def __load(self)->bool:
+        """
+        Reopen the curves from the store, return False if they are not available
+        """
+
+        if self.__store is None:
+            return False
+
+        curves = self.__store.load(self.__key())
+        if curves is None:
+            return False
+
+        self.__dates = curves['dates']
+        self.__yf_30_360 = curves['yf_30_360']
+        self.__yf_365 = curves['yf_365']
+        self.__discount_factors = curves['discount_factors']
+        self.__zero_rates = curves['zero_rates']
+
+        return True
+
+    def __key(self)->str:
+        """
+        Key of the curves in the store
+        """
+
+        # the curves depend on the OIS rates, the calendar and the code computing them
+        return self.__store.key(self.__OIS_data, self.__holidays, self.__roll,
+            [__file__, sys.modules[yearfrac.__module__].__file__])
+
+    def __save(self)->None:
+        """
+        Save the curves in the store (if any)
+        """
+
+        if self.__store is None:
+            return
+
+        self.__store.save(self.__key(), {
+            'dates': self.__dates,
+            'yf_30_360': self.__yf_30_360,
+            'yf_365': self.__yf_365,
+            'discount_factors': self.__discount_factors,
+            'zero_rates': self.__zero_rates
+        })
     
-    def __to_timedelta(self, offset_str:str)->datetime.timedelta:
+    def __tenor(self, offset_str:str)->tuple[int, str]:
         """
-        Convert a string to a timedelta object
+        Split a tenor string (e.g. '15M') into its number and unit
         """
 
         # get the numeric part of the string
@@ -51,18 +118,31 @@ class Bootstrap:
         # get the unit part of the string
         unit = offset_str.replace(num_str, '')
 
-        # convert the unit to a timedelta object
-        if unit == 'D':
-            return relativedelta.relativedelta(days=num)
-        elif unit == 'W':
-            return relativedelta.relativedelta(weeks=num)
-        elif unit == 'M':
-            return relativedelta.relativedelta(months=num)
-        elif unit == 'Y':
-            return relativedelta.relativedelta(years=num)
-        else:
+        if unit not in ['D', 'W', 'M', 'Y']:
             raise ValueError('Invalid unit in the offset string')
 
+        return num, unit
+
+    def __add_tenor(self, dates:np.ndarray, num:int, unit:str)->np.ndarray:
+        """
+        Add a tenor to an array of datetime64[D] dates, clamping the day to the end of the month
+        """
+
+        if unit == 'D':
+            return dates + np.timedelta64(num, 'D')
+        if unit == 'W':
+            return dates + np.timedelta64(7 * num, 'D')
+
+        # month arithmetic (years are 12 months)
+        months = num if unit == 'M' else 12 * num
+        month_start = dates.astype('datetime64[M]')
+        day = dates - month_start.astype('datetime64[D]')
+        target_start = month_start + np.timedelta64(months, 'M')
+        target_end = (target_start + np.timedelta64(1, 'M')).astype('datetime64[D]') - \
+            np.timedelta64(1, 'D')
+
+        return np.minimum(target_start.astype('datetime64[D]') + day, target_end)
+
     def dates(self)->pd.DataFrame:
         """
         Compute the dates for the OIS rates
@@ -72,27 +152,26 @@ class Bootstrap:
         if self.__dates is not None:
             return self.__dates
 
-        # offsets list to match the tenors of the OIS rates
-        offsets = {
-            self.__OIS_data.columns[i]:
-                self.__to_timedelta(self.__OIS_data.columns[i].replace('EUREON', ''))
-            for i in range(1, len(self.__OIS_data.columns))
-        }
+        return self.__compute_dates(self.__OIS_data)
+
+    def __compute_dates(self, data:pd.DataFrame)->pd.DataFrame:
+        """
+        Compute the dates for the given rows of OIS rates
+        """
+
+        start = data['Date'].to_numpy(dtype='datetime64[D]')
 
         # compute the dates
-        dates = pd.DataFrame(columns = self.__OIS_data.columns)
-        dates['Date'] = self.__OIS_data['Date']
-
-        # use the offset to calculate the dates
-        for i in range(1, len(self.__OIS_data.columns)):
-            # sum the offset to the date
-            dates[self.__OIS_data.columns[i]] = dates['Date'].apply(
-                lambda x: x + offsets[self.__OIS_data.columns[i]])
+        dates = {'Date': data['Date'].to_numpy(dtype='datetime64[ns]')}
+
+        for name in data.columns[1:]:
+            # sum the tenor to the date
+            tenor_dates = self.__add_tenor(start, *self.__tenor(name.replace('EUREON', '')))
             # move them to business days
-            dates[self.__OIS_data.columns[i]] = dates[self.__OIS_data.columns[i]].apply(
-                lambda x: x + pd.tseries.offsets.BDay(0))
+            tenor_dates = np.busday_offset(tenor_dates, 0, roll=self.__roll, holidays=self.__holidays)
+            dates[name] = tenor_dates.astype('datetime64[ns]')
 
-        return dates
+        return pd.DataFrame(dates, index=data.index)[data.columns]
 
     def year_fractions(self, convention:str)->pd.DataFrame:
         """
@@ -101,27 +180,73 @@ class Bootstrap:
 
         # check that the dates have been computed
         if self.__dates is None:
-            self.__dates = self.compute_dates()
-        
-        # compute the year fractions with the given convention
-        d = {
-            name: yearfrac(self.__OIS_data['Date'], self.__dates[name], convention).to_list()
-            for name in self.__OIS_data.columns[1:]
-        }
-        d['Date'] = self.__OIS_data['Date'].to_list()
+            self.__dates = self.dates()
+
+        return self.__compute_year_fractions(self.__OIS_data, self.__dates, convention)
+
+    def __compute_year_fractions(self, data:pd.DataFrame, dates:pd.DataFrame,
+        convention:str)->pd.DataFrame:
+        """
+        Compute the year fractions between the given rows of dates
+        """
 
+        # compute the year fractions with the given convention, for all the pillars at once
+        start = data['Date'].to_numpy(dtype='datetime64[ns]')
+        yf = yearfrac(start[:, None], dates[data.columns[1:]].to_numpy(dtype='datetime64[ns]'),
+            convention)
 
-        df = pd.DataFrame(data=d) 
-        # reorder the columns
-        df = df[self.__OIS_data.columns]
-        # cast all the columns to float
-        df[self.__OIS_data.columns[1:]] = df[self.__OIS_data.columns[1:]].astype(float)
+        df = pd.DataFrame(yf, columns=data.columns[1:])
+        df.insert(0, 'Date', start)
 
         return df
 
+    def __tenor_schedule(self)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Parse the EUREON* column headers into the payment schedule of each OIS
+        Output:
+        - payments: boolean matrix (pillars x pillars), payments[j, i] is True if the OIS of
+            pillar j pays on pillar i
+        - previous: index of the previous payment date of each pillar (-1 for the start date)
+        - accrual: integer matrix (pillars x pillars), the payment of the OIS of pillar j on
+            pillar i accrues over the period ending on pillar accrual[j, i]
+        Swaps longer than one year pay yearly, going back from the maturity in steps of 12 months.
+        As in the original bootstrap, the 1Y payment of the yearly swaps accrues over the period
+        from 1Y to 2Y (not from the start date to 1Y).
+        """
+
+        names = self.__OIS_data.columns[1:]
+        tenors = [self.__tenor(name.replace('EUREON', '')) for name in names]
+
+        # tenors in months (weeks and days are always paid in a single payment)
+        months = [num if unit == 'M' else 12 * num if unit == 'Y' else None for num, unit in tenors]
+        position = {m: i for i, m in enumerate(months) if m is not None}
+
+        previous = np.full(len(names), -1)
+        payments = np.eye(len(names), dtype=bool)
+        accrual = np.tile(np.arange(len(names)), (len(names), 1))
+
+        for j, m in enumerate(months):
+            # walk back from the maturity one year at a time
+            i = j
+            while m is not None and m > 12:
+                m -= 12
+                if m not in position:
+                    raise ValueError(f'Missing the {m}M pillar needed to bootstrap {names[j]}')
+                previous[i] = position[m]
+                # the 1Y payment accrues over the period of the 2Y payment
+                if m == 12:
+                    accrual[j, position[m]] = i
+                i = position[m]
+                payments[j, i] = True
+
+        return payments, previous, accrual
+
     def discount_factors(self)->pd.DataFrame:
         """
         Compute the discount factors from the OIS rates
+        All the dates are bootstrapped at once by solving, for each date, the triangular system
+        sum_i R_j * delta_ji * DF_i + DF_j = 1 over the payment dates i of the OIS of pillar j,
+        delta_ji being the year fraction the payment on i accrues over (see __tenor_schedule).
         """
 
         if self.__discount_factors is not None:
@@ -131,48 +256,30 @@ class Bootstrap:
         if self.__yf_30_360 is None:
             self.__yf_30_360 = self.year_fractions('EU_30_360')
 
-        DF = pd.DataFrame()
-
-        # for dates less than one year, compute directly
-        under_one_year_cols = ['EUREON1W', 'EUREON2W', 'EUREON3W', 'EUREON1M', 'EUREON2M',
-            'EUREON3M', 'EUREON4M', 'EUREON5M', 'EUREON6M', 'EUREON7M', 'EUREON8M', 'EUREON9M',
-            'EUREON10M', 'EUREON11M', 'EUREON1Y']
-        DF[under_one_year_cols] = 1 / (1 + self.__OIS_data[under_one_year_cols].values *
-            self.__yf_30_360[under_one_year_cols].values)
-
-        delta_3m = self.__yf_30_360['EUREON15M'].values - self.__yf_30_360['EUREON3M'].values
-        delta_6m = self.__yf_30_360['EUREON18M'].values - self.__yf_30_360['EUREON6M'].values
-        delta_9m = self.__yf_30_360['EUREON21M'].values - self.__yf_30_360['EUREON9M'].values
-
-        # for dates between one year and two years, compute using the formula
-        DF['EUREON15M'] = (1 - self.__OIS_data['EUREON15M'].values * self.__yf_30_360['EUREON3M'].values * \
-            DF['EUREON3M'].values) / (1 + self.__OIS_data['EUREON15M'].values * delta_3m)
-        DF['EUREON18M']= (1 - self.__OIS_data['EUREON18M'].values * self.__yf_30_360['EUREON6M'].values * \
-            DF['EUREON6M'].values) / (1 + self.__OIS_data['EUREON18M'].values * delta_6m)
-        DF['EUREON21M'] = (1 - self.__OIS_data['EUREON21M'].values * self.__yf_30_360['EUREON9M'].values * \
-            DF['EUREON9M'].values) / (1 + self.__OIS_data['EUREON21M'].values * delta_9m)
-
-        # for yearly dates, compute using the formula
-        yearly = ['EUREON2Y', 'EUREON3Y', 'EUREON4Y', 'EUREON5Y', 'EUREON6Y', 'EUREON7Y',
-            'EUREON8Y', 'EUREON9Y', 'EUREON10Y']
-        # compute the year fractions between the yearly dates
-        yearly_delta = self.__yf_30_360[['EUREON1Y', *yearly]].diff(axis=1)
-        yearly_delta = yearly_delta.drop(columns='EUREON1Y')
-
-        s = yearly_delta['EUREON2Y'].values * DF['EUREON1Y'].values
-
-        for i, tenor in enumerate(yearly):
-            # get the rate
-            R = self.__OIS_data[tenor].values 
-            DF[tenor] = (1 - R * s) / (1 + R * yearly_delta[tenor].values)
-            # update the sum
-            s += yearly_delta[tenor].values * DF[tenor].values
-
-        DF['Date'] = self.__OIS_data['Date'].values
-
-        # reorder the columns and cast them to float
-        DF = DF[self.__OIS_data.columns]
-        DF[self.__OIS_data.columns[1:]] = DF[self.__OIS_data.columns[1:]].astype(float)
+        return self.__compute_discount_factors(self.__OIS_data, self.__yf_30_360)
+
+    def __compute_discount_factors(self, data:pd.DataFrame, yf_30_360:pd.DataFrame)->pd.DataFrame:
+        """
+        Compute the discount factors for the given rows of OIS rates
+        """
+
+        columns = data.columns[1:]
+        payments, previous, accrual = self.__tenor_schedule()
+
+        # (dates x pillars) matrices of rates and year fractions
+        R = data[columns].to_numpy(dtype=float)
+        yf = yf_30_360[columns].to_numpy(dtype=float)
+
+        # year fractions between consecutive payment dates
+        yf_previous = np.where(previous >= 0, yf[:, previous], 0.0)
+        delta = yf - yf_previous
+
+        # batched (dates x pillars x pillars) system
+        A = R[:, :, None] * delta[:, accrual] * payments[None, :, :] + np.eye(len(columns))
+        DF = np.linalg.solve(A, np.ones((len(R), len(columns), 1)))[:, :, 0]
+
+        DF = pd.DataFrame(DF, columns=columns)
+        DF.insert(0, 'Date', data['Date'].values)
 
         return DF
 
@@ -191,20 +298,83 @@ class Bootstrap:
         # check that the year fractions have been computed
         if self.__yf_365 is None:
             self.__yf_365 = self.year_fractions('ACT_365')
-        
-        # compute the zero rates
-        zero_rates = pd.DataFrame()
-        zero_rates['Date'] = self.__OIS_data['Date'].values
-        zero_rates[self.__OIS_data.columns[1:]] = - np.log(self.__discount_factors[
-            self.__OIS_data.columns[1:]].values) / \
-            self.__yf_365[self.__OIS_data.columns[1:]].values
 
-        # reorder the columns and cast them to float
-        zero_rates = zero_rates[self.__OIS_data.columns]
-        zero_rates[self.__OIS_data.columns[1:]] = zero_rates[self.__OIS_data.columns[1:]].astype(float)
+        return self.__compute_zero_rates(self.__OIS_data, self.__discount_factors, self.__yf_365)
+
+    def __compute_zero_rates(self, data:pd.DataFrame, discount_factors:pd.DataFrame,
+        yf_365:pd.DataFrame)->pd.DataFrame:
+        """
+        Compute the zero rates for the given rows of discount factors
+        """
+
+        # compute the zero rates
+        zero_rates = pd.DataFrame(
+            - np.log(discount_factors[data.columns[1:]].to_numpy(dtype=float)) /
+            yf_365[data.columns[1:]].to_numpy(dtype=float),
+            columns=data.columns[1:])
+        zero_rates.insert(0, 'Date', data['Date'].values)
 
         return zero_rates
 
+    def append(self, new_rows:pd.DataFrame)->None:
+        """
+        Append new rows of OIS rates (e.g. the daily update) to the curve.
+        Only the new rows are bootstrapped, the history is left untouched.
+        - new_rows: pandas DataFrame with the same columns as the OIS data and dates after the
+            last bootstrapped date
+        """
+
+        # check that the new rows match the OIS data
+        if list(new_rows.columns) != list(self.__OIS_data.columns):
+            raise ValueError('The new rows must have the same columns as the OIS data')
+
+        if new_rows.empty:
+            return
+
+        # check that the new rows come after the last bootstrapped date
+        last_date = self.__OIS_data['Date'].max()
+        if (new_rows['Date'] <= last_date).any():
+            raise ValueError('The new rows must be after the last bootstrapped date')
+
+        new_rows = new_rows.sort_values('Date').reset_index(drop=True)
+
+        # bootstrap the new rows only
+        dates = self.__compute_dates(new_rows)
+        yf_30_360 = self.__compute_year_fractions(new_rows, dates, 'EU_30_360')
+        yf_365 = self.__compute_year_fractions(new_rows, dates, 'ACT_365')
+        discount_factors = self.__compute_discount_factors(new_rows, yf_30_360)
+        zero_rates = self.__compute_zero_rates(new_rows, discount_factors, yf_365)
+
+        # append them to the history
+        previous_key = None if self.__store is None else self.__key()
+        self.__OIS_data = pd.concat([self.__OIS_data, new_rows], ignore_index=True)
+        self.__dates = pd.concat([self.__dates, dates], ignore_index=True)
+        self.__yf_30_360 = pd.concat([self.__yf_30_360, yf_30_360], ignore_index=True)
+        self.__yf_365 = pd.concat([self.__yf_365, yf_365], ignore_index=True)
+        self.__discount_factors = pd.concat([self.__discount_factors, discount_factors],
+            ignore_index=True)
+        self.__zero_rates = pd.concat([self.__zero_rates, zero_rates], ignore_index=True)
+
+        # save the new rows next to the stored history (all the curves if it is not stored)
+        if self.__store is not None and not self.__store.append(previous_key, self.__key(), {
+                'dates': dates,
+                'yf_30_360': yf_30_360,
+                'yf_365': yf_365,
+                'discount_factors': discount_factors,
+                'zero_rates': zero_rates
+            }):
+            self.__save()
+
+        # the indexed curve has to be rebuilt
+        self.__lookup = None
+
+        # drop the cached interpolations that were padded with the previous last date
+        self.__interpolated = {
+            key: value
+            for key, value in self.__interpolated.items()
+            if value['Date'].max() <= last_date
+        }
+
     def __bootstrap(self)->None:
         """
         Perform the bootstrapping of the zero rates
@@ -230,7 +400,7 @@ class Bootstrap:
 
         # save the year fractions
         t0 = datetime.datetime.now()
-        self.__year_fractions = self.year_fractions('ACT_365')
+        self.__yf_365 = self.year_fractions('ACT_365')
         t1 = datetime.datetime.now()
         print(f'Time taken to compute the year fractions: {(t1 - t0).total_seconds()} s')
 
@@ -240,110 +410,103 @@ class Bootstrap:
         t1 = datetime.datetime.now()
         print(f'Time taken to compute the zero rates: {(t1 - t0).total_seconds()} s')
 
-    def __pad_zero_rates(self, target_dates:pd.Series)->pd.DataFrame:
+    def lookup(self)->CurveLookup:
         """
-        Pad the zero rates to match the dates
+        Return the indexed curve, to access the year fractions and zero rates of a date in O(1)
         """
 
+        if self.__lookup is not None:
+            return self.__lookup
+
         # check that the zero rates have been computed
         if self.__zero_rates is None:
             self.__zero_rates = self.zero_rates()
 
-        # pad the zero rates
-        zero_rates = pd.DataFrame()
-        zero_rates['Date'] = target_dates.values
-
-        # fill the zero rates we have
-        zero_rates = pd.merge(zero_rates, self.__zero_rates, on='Date', how='left')
-        
-        # fill the zero rates we don't have
-        zero_rates = zero_rates.ffill()
+        self.__lookup = CurveLookup(
+            self.__zero_rates['Date'].to_numpy(),
+            self.__yf_365.iloc[:, 1:].to_numpy(dtype=float),
+            self.__zero_rates.iloc[:, 1:].to_numpy(dtype=float)
+        )
 
-        return zero_rates
+        return self.__lookup
 
-    def __pad_yf(self, target_dates:pd.Series)->pd.DataFrame:
+    def interpolate(self, target_dates:pd.Series, target_expiries:pd.Series)->pd.DataFrame:
         """
-        Pad the year fractions to match the dates
+        Interpolate the zero rates to match the dates and expiries
+        - target_dates: pandas Series with the target dates
+        - target_expiries: pandas Series with the target expiries
+        The interpolation is done for all the (date, expiry) pairs at once and the result is
+        cached, so repeated calls with the same dates and expiries are free.
         """
 
-        # check that the year fractions have been computed
-        if self.__yf_365 is None:
-            self.__yf_365 = self.year_fractions('ACT_365')
-
-        # pad the year fractions
-        yf = pd.DataFrame()
-        yf['Date'] = target_dates.values
-
-        # fill the year fractions we have
-        yf = pd.merge(yf, self.__yf_365, on='Date', how='left')
+        # check that target_dates and target_expiries have the same length
+        if len(target_dates) != len(target_expiries):
+            raise ValueError('target_dates and target_expiries must have the same length')
 
-        # fill the year fractions we don't have
-        yf = yf.ffill()
+        expiries = pd.Series(target_expiries).to_numpy(dtype='datetime64[ns]')
 
-        return yf
+        return self.__interpolate_columns(target_dates, expiries[:, None])[0].copy()
 
-    def __pad_dates(self, target_dates:pd.Series)->pd.DataFrame:
+    def interpolate_surface(self, target_dates:pd.Series, target_expiries:np.ndarray
+        )->tuple[np.ndarray, np.ndarray]:
         """
-        Pad the dates to match the zero rates
+        Interpolate the zero rates of several expiries on each date in one pass
+        - target_dates: pandas Series with the target dates
+        - target_expiries: array of shape (dates, maturities) with the expiries of each date (NaT
+            where there is no expiry)
+        Returns the (dates x maturities) arrays of the zero rates and of the ACT_365 year fractions
+        (NaN where there is no expiry). Each maturity shares the cache of interpolate.
         """
 
-        # check that the dates have been computed
-        if self.__dates is None:
-            self.__dates = self.dates()
+        expiries = np.asarray(target_expiries, dtype='datetime64[ns]')
 
-        # pad the dates
-        dates = pd.DataFrame()
-        dates['Date'] = target_dates.values
+        # check that there is a row of expiries for each date
+        if expiries.ndim != 2 or len(expiries) != len(target_dates):
+            raise ValueError('target_expiries must have one row for each of the target_dates')
 
-        # fill the dates we have
-        dates = pd.merge(dates, self.__dates, on='Date', how='left')
+        columns = self.__interpolate_columns(target_dates, expiries)
 
-        # fill the dates we don't have taking the same offset as the last date
-        for i, row in dates[dates.isnull().any(axis=1)].iterrows():
-            # get the previous date
-            prev_date = dates.loc[i - 1, 'Date']
-            # compute the offset
-            offset = row['Date'] - prev_date
-            # move all the previous dates by the offset
-            dates.iloc[i, 1:] = dates.iloc[i - 1, 1:].apply(lambda x: x + offset)
+        rates = np.column_stack([column['Risk Free Rate'].to_numpy() for column in columns])
+        yf_expiry = np.column_stack([column['Year Fraction'].to_numpy() for column in columns])
 
-        return dates
+        return rates.reshape(expiries.shape), yf_expiry.reshape(expiries.shape)
 
-    def interpolate(self, target_dates:pd.Series, target_expiries:pd.Series)->pd.DataFrame:
+    def __interpolate_columns(self, target_dates:pd.Series, expiries:np.ndarray
+        )->list[pd.DataFrame]:
         """
-        Interpolate the zero rates to match the dates and expiries
-        - target_dates: pandas Series with the target dates
-        - target_expiries: pandas Series with the target expiries
+        Interpolate the zero rates of each column of the (dates x maturities) expiries, with the
+        'Date', 'Risk Free Rate' and 'Year Fraction' of each column.
+        The columns are cached by dates and expiries, the ones not in the cache are interpolated
+        together (the row of the curve of each date is found once for all of them).
         """
 
-        # check that target_dates and target_expiries have the same length
-        if len(target_dates) != len(target_expiries):
-            raise ValueError('target_dates and target_expiries must have the same length')
+        target_dates = pd.Series(target_dates)
+        dates = target_dates.to_numpy(dtype='datetime64[ns]')
+
+        keys = [(dates.tobytes(), expiries[:, k].tobytes()) for k in range(expiries.shape[1])]
+        missing = [k for k, key in enumerate(keys) if key not in self.__interpolated]
+
+        if missing:
+            # row of the curve of each date: the last bootstrapped date on or before it, in any
+            # order (-1 before the start of the curve)
+            rows = self.lookup().rows(dates)[:, None]
+
+            # year fractions of the expiries
+            yf_expiry = yearfrac(dates[:, None], expiries[:, missing], 'ACT_365')
+
+            # interpolate the zero rates of all the missing expiries of each row at once
+            rates = self.lookup().interpolate(np.maximum(rows, 0), yf_expiry)
+            rates = np.where(rows >= 0, rates, np.nan)
+
+            # save the interpolation of each column
+            for i, k in enumerate(missing):
+                interpolated = pd.DataFrame()
+                interpolated['Date'] = dates
+                interpolated['Risk Free Rate'] = rates[:, i]
+                interpolated['Year Fraction'] = yf_expiry[:, i]
+                self.__interpolated[keys[k]] = interpolated
 
-        # pad the data to match the dates
-        dates = self.__pad_dates(target_dates)
-        yf = self.__pad_yf(target_dates)
-        zero_rates = self.__pad_zero_rates(target_dates)
-
-        # interpolate the zero rates by row to match the expiries
-        interpolated = pd.DataFrame()
-        interpolated['Date'] = target_dates.values
-        interpolated['Risk Free Rate'] = np.nan
-        interpolated['Year Fraction'] = np.nan
-
-        for i, row in zero_rates.iterrows():
-            # get the expiry
-            yf_expiry = yearfrac(row['Date'], target_expiries.iloc[i], 'ACT_365')
-            # get the corresponding data points as numpy arrays of floats
-            xp = yf.iloc[i].values[1:].astype(float)
-            fp = row.values[1:].astype(float)
-            # interpolate the zero rates
-            interpolated.loc[i, 'Risk Free Rate'] = np.interp(
-                yf_expiry, xp, fp)
-            # save the year fraction
-            interpolated.loc[i, 'Year Fraction'] = yf_expiry
-        
-        return interpolated
+        return [self.__interpolated[key] for key in keys]
 
 # Testing
 if __name__ == '__main__':
@@ -1 +1,4 @@
-from .Bootstrap import Bootstrap
\ No newline at end of file
+from .Bootstrap import Bootstrap
+from .eur_calendar import eur_calendar
+from .curve_store import CurveStore
+from .curve_lookup import CurveLookup
\ No newline at end of file
@@ -0,0 +1,142 @@
+import datetime
+import hashlib
+import numpy as np
+import pandas as pd
+
+def interp_rows(x:np.ndarray, xp:np.ndarray, fp:np.ndarray, rows:np.ndarray = None)->np.ndarray:
+    """
+    Row-wise linear interpolation with flat extrapolation (as np.interp on every row)
+    - x: array with the points to interpolate
+    - xp: array of shape (n, k) with the increasing pillars of each row
+    - fp: array of shape (n, k) with the values at the pillars
+    - rows: rows of xp and fp to use for each point (broadcast against x). Default is the i-th
+        row for the points x[i]
+    """
+
+    if rows is None:
+        rows = np.arange(len(x)).reshape((-1,) + (1,) * (x.ndim - 1))
+
+    # index of the left pillar of each point (row-wise searchsorted, the pillars are increasing)
+    left = np.zeros(np.broadcast(x, rows).shape, dtype=np.intp)
+    for k in range(1, xp.shape[1] - 1):
+        left += xp[rows, k] <= x
+
+    # linear blend between the left and right pillars
+    x_left, x_right = xp[rows, left], xp[rows, left + 1]
+    f_left, f_right = fp[rows, left], fp[rows, left + 1]
+    slope = (f_right - f_left) / (x_right - x_left)
+    out = slope * (x - x_left) + f_left
+
+    # flat extrapolation outside of the pillars
+    out = np.where(x <= xp[rows, 0], fp[rows, 0], out)
+    out = np.where(x >= xp[rows, -1], fp[rows, -1], out)
+
+    return out
+
+class CurveLookup:
+    """
+    Indexed access to a bootstrapped curve.
+    The dates are mapped to their row once, so the pillar year fractions (ACT_365) and zero rates
+    of any date are returned as numpy row views without scanning the curve.
+    Dates that were not bootstrapped use the last bootstrapped date before them.
+    """
+
+    def __init__(self, dates:np.ndarray, year_fractions:np.ndarray, zero_rates:np.ndarray):
+        """
+        Constructor for the CurveLookup class
+        :param dates: array of shape (n,) with the bootstrapped dates
+        :param year_fractions: array of shape (n, pillars) with the ACT_365 year fractions
+        :param zero_rates: array of shape (n, pillars) with the zero rates
+        """
+
+        self.__dates = np.asarray(dates, dtype='datetime64[ns]').astype(np.int64)
+        self.__year_fractions = np.asarray(year_fractions, dtype=float)
+        self.__zero_rates = np.asarray(zero_rates, dtype=float)
+
+        # map each date to its row
+        self.__rows = {date: i for i, date in enumerate(self.__dates.tolist())}
+
+        # sorted dates for the dates that were not bootstrapped
+        self.__order = np.argsort(self.__dates, kind='stable')
+        self.__sorted_dates = self.__dates[self.__order]
+
+    def __len__(self)->int:
+        """
+        Number of bootstrapped dates
+        """
+        return len(self.__dates)
+
+    def __getitem__(self, date:datetime.datetime)->tuple[np.ndarray, np.ndarray]:
+        """
+        Return the pillar year fractions and zero rates of the date (as views of the curve)
+        """
+
+        row = self.row(date)
+
+        return self.__year_fractions[row], self.__zero_rates[row]
+
+    def row(self, date:datetime.datetime)->int:
+        """
+        Return the row of the curve to use for the date
+        """
+
+        key = pd.Timestamp(date).as_unit('ns').value
+
+        row = self.__rows.get(key)
+        if row is not None:
+            return row
+
+        # otherwise use the last bootstrapped date before it
+        position = np.searchsorted(self.__sorted_dates, key, side='right') - 1
+        if position < 0:
+            raise KeyError(f'The date {date} is before the start of the curve')
+
+        return int(self.__order[position])
+
+    def rows(self, dates:pd.Series | np.ndarray)->np.ndarray:
+        """
+        Return the rows of the curve to use for an array of dates (-1 if before the curve)
+        """
+
+        dates = pd.Series(dates).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        position = np.searchsorted(self.__sorted_dates, dates, side='right') - 1
+
+        return np.where(position >= 0, self.__order[np.maximum(position, 0)], -1)
+
+    def interpolate(self, rows:np.ndarray, x:np.ndarray)->np.ndarray:
+        """
+        Interpolate the zero rates of the given rows of the curve
+        - rows: rows of the curve to use for each point (broadcast against x)
+        - x: array with the ACT_365 year fractions to interpolate
+        """
+        return interp_rows(x, self.__year_fractions, self.__zero_rates, rows)
+
+    def fingerprint(self)->str:
+        """
+        Return a hash of the dates, year fractions and zero rates of the curve
+        """
+
+        h = hashlib.sha256()
+        for values in [self.__dates, self.__year_fractions, self.__zero_rates]:
+            h.update(np.ascontiguousarray(values).tobytes())
+
+        return h.hexdigest()
+
+    def dates(self)->np.ndarray:
+        """
+        Return the bootstrapped dates (datetime64[ns])
+        """
+        return self.__dates.astype('datetime64[ns]')
+
+    def year_fractions(self)->np.ndarray:
+        """
+        Return the (dates x pillars) matrix of the ACT_365 year fractions
+        """
+        return self.__year_fractions
+
+    def zero_rates(self)->np.ndarray:
+        """
+        Return the (dates x pillars) matrix of the zero rates
+        """
+        return self.__zero_rates
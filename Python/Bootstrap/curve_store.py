@@ -0,0 +1,206 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+class CurveStore:
+    """
+    On-disk store of bootstrapped curves.
+    Each curve is saved as a set of .npy matrices (dates x pillars) in a directory named after a
+    hash of the inputs, and reopened memory-mapped so that several processes share the same pages.
+    Rows appended to a curve are saved as extra chunks in the same directory, which is renamed
+    to the key of the extended inputs (the superseded key is not kept).
+    """
+
+    # names of the stored curves
+    CURVES = ['dates', 'yf_30_360', 'yf_365', 'discount_factors', 'zero_rates']
+
+    def __init__(self, directory:str = None):
+        """
+        Constructor for the CurveStore class
+        :param directory: directory where the curves are saved. Default is Bootstrap/Curves/
+        """
+
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Curves')
+
+        self.__directory = directory
+
+        # if the directory does not exist, create it
+        if not os.path.exists(self.__directory):
+            os.makedirs(self.__directory)
+
+    @staticmethod
+    def key(data:pd.DataFrame, holidays:np.ndarray, roll:str, sources:list[str] = ())->str:
+        """
+        Fingerprint of the inputs of a bootstrap (OIS rates and business day calendar) and of
+        the source files of the code computing the curves
+        """
+
+        h = hashlib.sha256()
+        h.update(json.dumps(list(data.columns)).encode())
+        h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        h.update(np.asarray(holidays, dtype='datetime64[D]').tobytes())
+        h.update(roll.encode())
+        for path in sources:
+            with open(path, 'rb') as f:
+                h.update(f.read())
+
+        return h.hexdigest()
+
+    def load(self, key:str)->dict[str, pd.DataFrame] | None:
+        """
+        Reopen the curves saved under the given key, None if they are not in the store
+        """
+
+        path = os.path.join(self.__directory, key)
+
+        if not os.path.exists(path):
+            return None
+
+        with open(os.path.join(path, 'columns.json'), 'r') as f:
+            columns = json.load(f)
+
+        date = self.__read(path, 'Date')
+
+        curves = {}
+        for name in self.CURVES:
+            values = self.__read(path, name)
+            df = pd.DataFrame(values, columns=columns[1:], copy=False)
+            df.insert(0, columns[0], date)
+            curves[name] = df
+
+        return curves
+
+    def save(self, key:str, curves:dict[str, pd.DataFrame])->None:
+        """
+        Save the curves under the given key
+        """
+
+        path = os.path.join(self.__directory, key)
+
+        if os.path.exists(path):
+            return
+
+        # write to a temporary directory and rename it, so readers never see partial curves
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        os.makedirs(tmp_path)
+
+        columns = list(curves['dates'].columns)
+        with open(os.path.join(tmp_path, 'columns.json'), 'w') as f:
+            json.dump(columns, f)
+
+        np.save(os.path.join(tmp_path, 'Date.npy'),
+            curves['dates'][columns[0]].to_numpy(dtype='datetime64[ns]'))
+
+        for name in self.CURVES:
+            dtype = 'datetime64[ns]' if name == 'dates' else float
+            np.save(os.path.join(tmp_path, f'{name}.npy'),
+                curves[name][columns[1:]].to_numpy(dtype=dtype))
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # another process saved the same curves in the meantime
+            shutil.rmtree(tmp_path)
+
+    def append(self, key:str, new_key:str, rows:dict[str, pd.DataFrame])->bool:
+        """
+        Append rows to the curves saved under key and move them to new_key, writing only the new
+        rows. Return False if the curves are not in the store or the rows could not be written
+        (the curves stay under key).
+        """
+
+        path = os.path.join(self.__directory, key)
+        new_path = os.path.join(self.__directory, new_key)
+
+        # take the curves out of the store while they are extended, so readers never see
+        # partial curves
+        tmp_path = f'{new_path}.{os.getpid()}.tmp'
+        try:
+            os.rename(path, tmp_path)
+        except OSError:
+            return False
+
+        chunk = self.__chunks(tmp_path) + 1
+
+        try:
+            columns = list(rows['dates'].columns)
+            np.save(os.path.join(tmp_path, f'Date.{chunk}.npy'),
+                rows['dates'][columns[0]].to_numpy(dtype='datetime64[ns]'))
+
+            for name in self.CURVES:
+                dtype = 'datetime64[ns]' if name == 'dates' else float
+                np.save(os.path.join(tmp_path, f'{name}.{chunk}.npy'),
+                    rows[name][columns[1:]].to_numpy(dtype=dtype))
+
+            self.__write_chunks(tmp_path, chunk)
+        except Exception:
+            # put the curves back as they were
+            self.__restore(tmp_path, path, chunk)
+            return False
+
+        try:
+            os.rename(tmp_path, new_path)
+        except OSError:
+            if not os.path.exists(new_path):
+                self.__restore(tmp_path, path, chunk)
+                return False
+            # another process saved the same curves in the meantime
+            shutil.rmtree(tmp_path)
+
+        return True
+
+    def __restore(self, tmp_path:str, path:str, chunk:int)->None:
+        """
+        Drop the chunk being appended to the curves in tmp_path and move them back to path
+        """
+
+        self.__write_chunks(tmp_path, chunk - 1)
+        for name in ['Date'] + self.CURVES:
+            try:
+                os.remove(os.path.join(tmp_path, f'{name}.{chunk}.npy'))
+            except FileNotFoundError:
+                pass
+
+        os.rename(tmp_path, path)
+
+    @staticmethod
+    def __write_chunks(path:str, chunks:int)->None:
+        """
+        Save the number of chunks appended to the curves in the directory
+        """
+
+        # write and rename, so the count is never read half written
+        with open(os.path.join(path, 'chunks.json.tmp'), 'w') as f:
+            json.dump(chunks, f)
+        os.replace(os.path.join(path, 'chunks.json.tmp'), os.path.join(path, 'chunks.json'))
+
+    @staticmethod
+    def __chunks(path:str)->int:
+        """
+        Number of chunks appended to the curves in the directory
+        """
+
+        try:
+            with open(os.path.join(path, 'chunks.json'), 'r') as f:
+                return json.load(f)
+        except OSError:
+            return 0
+
+    def __read(self, path:str, name:str)->np.ndarray:
+        """
+        Read a matrix of the curves with its appended chunks (mapped, not read, if there are none)
+        """
+
+        values = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+        chunks = self.__chunks(path)
+        if chunks == 0:
+            return values
+
+        return np.concatenate([values] + [
+            np.load(os.path.join(path, f'{name}.{chunk}.npy')) for chunk in range(1, chunks + 1)
+        ])
@@ -0,0 +1,56 @@
+import numpy as np
+
+def eur_calendar(first_year:int = 2000, last_year:int = 2065)->np.ndarray:
+    """
+    TARGET non-trading days between first_year and last_year (port of Data/eurCalendar.m).
+    The closing days are New Year's Day, Good Friday, Easter Monday, Labour Day, Christmas Day
+    and Boxing Day. Returns a sorted datetime64[D] array usable as np.busday_offset holidays.
+    """
+
+    years = np.arange(first_year, last_year + 1)
+
+    # fixed closing days
+    new_year = __make_dates(years, 1, 1)
+    labour_day = __make_dates(years, 5, 1)
+    christmas = __make_dates(years, 12, 25)
+    boxing_day = __make_dates(years, 12, 26)
+
+    # Good Friday and Easter Monday from the Easter Sunday
+    easter = __easter_sunday(years)
+    good_friday = easter - np.timedelta64(2, 'D')
+    easter_monday = easter + np.timedelta64(1, 'D')
+
+    return np.sort(np.concatenate([new_year, good_friday, easter_monday, labour_day, christmas,
+        boxing_day]))
+
+def __make_dates(years:np.ndarray, months:np.ndarray | int, days:np.ndarray | int)->np.ndarray:
+    """
+    Build a datetime64[D] array from years, months and days
+    """
+
+    first_of_month = (years - 1970) * 12 + (np.asarray(months) - 1)
+
+    return first_of_month.astype('datetime64[M]').astype('datetime64[D]') + \
+        (np.asarray(days) - 1).astype('timedelta64[D]')
+
+def __easter_sunday(years:np.ndarray)->np.ndarray:
+    """
+    Easter Sunday of the given years (anonymous Gregorian algorithm)
+    """
+
+    a = years % 19
+    b = years // 100
+    c = years % 100
+    d = b // 4
+    e = b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i = c // 4
+    k = c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+
+    return __make_dates(years, month, day)
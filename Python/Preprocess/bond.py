@@ -1,4 +1,5 @@
 import os
+import hashlib
 import datetime
 from dateutil.relativedelta import relativedelta
 from scipy.optimize import root_scalar
@@ -8,16 +9,23 @@ import pandas as pd
 # custom imports
 from yearfracion import yearfrac
 
+if __name__ == '__main__':
+    from issuer_prices import IssuerPrices
+else:
+    from .issuer_prices import IssuerPrices
+
 # Bond class
 class Bond:
 
-    # class attribute to keep track of the number of bonds that were not found
-    __unfound_info = []
+    # the bonds only hold arrays, no per instance dict
+    __slots__ = ('__code', '__coupon_rate', '__maturity_date', '__coupon_frequency', '__issuer',
+        '__volume', '__dates', '__prices', '__first_quote', '__schedule', '__accruals', '__z_spread')
+
     # date range for the data
     __start_date = None
     __end_date = None
-    # dict to hold already loaded data
-    __loaded_data = {}
+    # cache of the price matrices of the issuers (released with release_cache)
+    __issuer_prices = IssuerPrices(os.path.join('../Data/', 'Bonds/'))
 
     def __init__(self, code, coupon_rate, maturity_date, coupon_frequency, volume, issuer):
         """
@@ -41,27 +49,16 @@ class Bond:
         self.__coupon_frequency = coupon_frequency
         self.__issuer = issuer
         self.__volume = volume
-        # load the data for the bond
-        self.__data = self.load_data()
+        # load the price history of the bond (int64 dates and float64 prices)
+        self.__dates, self.__prices = self.load_data()
         # find the first quoted date
         self.__first_quote = self.__find_first_quote()
-        # compute the coupons 
-        self.__coupon_dates = self.__compute_coupon_dates()
-
-        # if no data was found, add it to the list of unfound bonds
-        if self.__data.empty:
-            self.__unfound_info.append(self)
+        # precompute the coupon schedule (int64 nanoseconds) and the 30/360 coupon of each period
+        self.__schedule, self.__accruals = self.__compute_schedule(self.__compute_coupon_dates())
 
         # initialize the z-spread
         self.__z_spread = None
     
-    @classmethod
-    def get_unfound_info(cls):
-        """
-        Return the list of bonds that were not found.
-        """
-        return cls.__unfound_info
-
     @classmethod
     def set_date_range(cls, start_date:datetime.date, end_date:datetime.date)->None:
         """
@@ -72,11 +69,32 @@ class Bond:
         """
         cls.__start_date = start_date
         cls.__end_date = end_date
+
+    @classmethod
+    def load_prices(cls, issuers:list[str], dates:pd.Series = None, cache = None)->None:
+        """
+        Read the prices of the issuers once (in parallel), aligned to the given dates.
+        Input:
+        - issuers: list with the tickers of the issuers.
+        - dates: Series with the dates to keep. Default is None (all the dates).
+        - cache: DatasetCache where the aligned prices are kept. Default is None (no cache).
+        """
+        cls.__issuer_prices.load(issuers, dates, cache)
+
+    @classmethod
+    def release_cache(cls, issuer:str = None)->None:
+        """
+        Release the price matrices of the issuers kept for the construction of the bonds.
+        Input:
+        - issuer: string with the ticker of the issuer to release. Default is None (all of them).
+        """
+        cls.__issuer_prices.release(issuer)
     
     def __repr__(self)->str:
         """
         String representation of the Bond object.
         """
+        coupon_dates = pd.DatetimeIndex(self.__schedule.view('datetime64[ns]'))
         # create a table with the information of the bond
         return f"""
   --- Bond {self.__code} ---
@@ -86,9 +104,9 @@ class Bond:
   Volume: {self.__volume}
   Issuer ticker: {self.__issuer}
   First quote: { self.__first_quote.strftime("%Y-%m-%d") if not pd.isnull(self.__first_quote) else 'Not found'}
-  Status: {'Found' if not self.__data.empty else 'Not found'}
-  Number of coupon payments: {len(self.__coupon_dates)}
-  Coupon dates: {" ".join([date.strftime('%Y-%m-%d') for date in self.__coupon_dates])}
+  Status: {'Found' if not self.is_empty() else 'Not found'}
+  Number of coupon payments: {len(coupon_dates)}
+  Coupon dates: {" ".join([date.strftime('%Y-%m-%d') for date in coupon_dates])}
   -------------------
   """
 
@@ -96,75 +114,53 @@ class Bond:
         """
         Check if the data of the bond is empty.
         """
-        return self.__data.empty
+        return len(self.__dates) == 0
     
     # magic method for the length of the bond
     def __len__(self)->int:
         """
         Get the length of the bond.
         """
-        return len(self.__data)
+        return len(self.__dates)
     
-    def load_data(self)->pd.DataFrame:
-        """
-        Load the data for the bond from the csv file of the parent company.
-        """
-        # load the data for the parent company
-        data_dir = '../Data/'
-        bonds_dir = 'Bonds/'
-
-        # check if the data was already loaded
-        if self.__issuer in self.__loaded_data:
-            parent_data = self.__loaded_data[self.__issuer]
-        # otherwise, load the data and save it
-        else:
-            parent_data = pd.read_csv(os.path.join(data_dir, bonds_dir, f'{self.__issuer}.csv'),
-                parse_dates=['Date'], dayfirst=False)
-            # drop the first and second columns
-            parent_data = parent_data.drop(columns=[parent_data.columns[0], parent_data.columns[1]])
-            self.__loaded_data[self.__issuer] = parent_data
-
-        # try to extract the data
-        out_df = pd.DataFrame()
-        try:
-            out_df = parent_data[['Date', self.__code]]
-            # select only the dates that are in the range
-            out_df = out_df.loc[out_df['Date'] > self.__start_date]
-            out_df = out_df.loc[out_df['Date'] < self.__end_date]
-        except KeyError:
-            # add it to the unfound bonds
-            self.__unfound_info.append(self)
-
-        # if the data is empty, raise an error
-        try:
-            if out_df.empty:
-                raise ValueError('The data is empty.')
-        except ValueError as e:
-            # put it into the list of unfound bonds
-            self.__unfound_info.append(self)
-        
-        # reindex the data
-        out_df = out_df.reset_index(drop=True)
+    def load_data(self)->tuple[np.ndarray, np.ndarray]:
+        """
+        Load the data for the bond from the price matrix of the parent company.
+        Output:
+        - int64 array with the dates (nanoseconds since epoch) in the date range.
+        - float64 array with the prices at those dates.
+        Both are views of the price matrix of the issuer.
+        """
+
+        dates, columns, prices = self.__issuer_prices.get(self.__issuer)
+
+        # the bond is not in the file of the issuer
+        if self.__code not in columns:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
 
-        return out_df
+        # select only the dates that are in the range (the dates are sorted)
+        first = np.searchsorted(dates, pd.Timestamp(self.__start_date).as_unit('ns').value, side='right')
+        last = np.searchsorted(dates, pd.Timestamp(self.__end_date).as_unit('ns').value, side='left')
+
+        return dates[first:last], prices[first:last, columns[self.__code]]
 
     def __find_first_quote(self)->datetime.date:
         """
         Find the first date where the bond was quoted.
         """
-        # if the data is empty, return None
-        if self.__data.empty:
+        quoted = self.__dates[~np.isnan(self.__prices)]
+        # if the bond was never quoted, return None
+        if len(quoted) == 0:
             return None
         # find the first date where the bond was quoted
-        first_quote = self.__data.loc[self.__data[self.__code].notnull(), 'Date'].min()
-        return first_quote
-    
+        return pd.Timestamp(quoted.min())
+
     def __compute_coupon_dates(self)->list[datetime.date]:
         """
         Compute the dates of the coupon payments using the frequency of the coupon and the maturity date.
         """
 
-        if pd.isnull(self.__first_quote):
+        if self.__first_quote is None:
             return []
 
         # find the time difference between coupons (in months)
@@ -186,6 +182,28 @@ class Bond:
 
         return coupon_dates.copy()
 
+    def __compute_schedule(self, coupon_dates:list[datetime.date])->tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the coupon schedule of the bond once.
+        Input:
+        - coupon_dates: list with the coupon dates.
+        Output:
+        - schedule: int64 array with the coupon dates (nanoseconds since epoch)
+        - accruals: coupon of each full period in 30/360 (from the previous coupon date), plus the
+            principal at maturity
+        """
+
+        coupon_dates = pd.Series(coupon_dates, dtype='datetime64[ns]').to_numpy()
+
+        previous = np.concatenate([coupon_dates[:1], coupon_dates[:-1]])
+        accruals = self.__coupon_rate * yearfrac(previous, coupon_dates, 'EU_30_360')
+
+        # add the principal
+        if len(accruals):
+            accruals[-1] += 100
+
+        return coupon_dates.astype(np.int64), accruals
+
     def code(self)->str:
         """
         Return the code of the bond.
@@ -198,117 +216,231 @@ class Bond:
         """
         return self.__issuer
 
+    def volume(self)->float:
+        """
+        Return the volume of the bond.
+        """
+        return self.__volume
+
     def dates(self)->pd.Series:
         """
         Return the dates of the bond.
         """
-        return self.__data['Date'].copy()
+        return pd.Series(self.__dates.view('datetime64[ns]'), name='Date', copy=True)
+
+    def fingerprint(self)->str:
+        """
+        Return a hash of the terms of the bond and of its price series.
+        """
+
+        h = hashlib.sha256()
+        h.update(repr((self.__code, self.__coupon_rate, self.__maturity_date,
+            self.__coupon_frequency, self.__volume, self.__issuer)).encode())
+        for values in [self.__schedule, self.__dates, self.__prices]:
+            h.update(np.ascontiguousarray(values).tobytes())
+
+        return h.hexdigest()
 
     def show_data(self)->None:
         """
         Show the data of the bond.
         """
-        print(self.__data)
+        print(pd.DataFrame({'Date': self.dates(), self.__code: self.__prices}))
 
     def filter_data(self, dates:pd.Series)->None:
         """
         Filter the data of the bond to only keep the dates in the list.
         Input:
         - dates: Series with the dates to keep.
+        """
+
+        keep = np.isin(self.__dates, pd.Series(dates).to_numpy(dtype='datetime64[ns]').astype(np.int64))
+
+        # keep the views if nothing is filtered out
+        if not keep.all():
+            self.__dates, self.__prices = self.__dates[keep], self.__prices[keep]
+
+    def cash_flows(self)->tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the cash flows of the bond at every quoted date, as a flat panel.
+        The dates too close to maturity (last cash flow in less than 0.075 years) are skipped.
         Output:
-        - DataFrame with the filtered data.
+        - positions: row of each quoted date in the data of the bond
+        - prices: price of the bond at each quoted date
+        - counts: number of cash flows at each quoted date
+        - cash flows: cash flows of all the dates, one date after the other
+        - year fractions: ACT_365 year fractions of the cash flows from their date
         """
 
-        # filter the data
-        self.__data = self.__data.loc[self.__data['Date'].isin(dates)]
+        # only the quoted dates
+        positions = np.flatnonzero(~np.isnan(self.__prices))
+        if len(positions) == 0:
+            empty = np.zeros(0)
+            return empty.astype(int), empty, empty.astype(int), empty, empty
+
+        target_dates = self.__dates[positions].view('datetime64[ns]')
+        prices = self.__prices[positions]
+        coupon_dates = self.__schedule.view('datetime64[ns]')
+
+        # skip the dates where the bond is too close to maturity
+        keep = yearfrac(target_dates, coupon_dates[-1], 'ACT_365') >= 0.075
+        target_dates, prices = target_dates[keep], prices[keep]
+
+        # coupons still to be paid at each date (the ones on or after the target date)
+        first = np.searchsorted(self.__schedule, target_dates.astype(np.int64), side='left')
+        counts = len(coupon_dates) - first
+        starts = np.cumsum(counts) - counts
 
-        # reindex the data
-        self.__data = self.__data.reset_index(drop=True)
+        # slice the schedule from the first coupon still to be paid
+        coupon = np.arange(counts.sum()) - np.repeat(starts - first, counts)
+        cash_flows = self.__accruals[coupon]
 
-    def __compute_cash_flows(self, target_date:datetime.date)->pd.DataFrame:
+        # the first coupon accrues from the target date
+        cash_flows[starts] = self.__coupon_rate * yearfrac(target_dates, coupon_dates[first],
+            'EU_30_360') + 100 * (first == len(coupon_dates) - 1)
+
+        x = yearfrac(np.repeat(target_dates, counts), coupon_dates[coupon], 'ACT_365')
+
+        return positions[keep], prices, counts, cash_flows, x
+
+    @staticmethod
+    def solve_z_spreads(cash_flows:np.ndarray, x:np.ndarray, f:np.ndarray, prices:np.ndarray,
+        offsets:np.ndarray, tol:float = 1e-12, max_iter:int = 50)->tuple[np.ndarray, np.ndarray]:
         """
-        Compute the cash flows of the bond at the target date.
+        Find the z-spreads that make the prices of the cash flows equal to the bond prices,
+        with a Newton iteration on all the prices at once.
+        Input:
+        - cash_flows: flat array of the cash flows of all the prices
+        - x: ACT_365 year fractions of the cash flows
+        - f: zero rates at the cash flow dates
+        - prices: array of shape (n,) with the prices
+        - offsets: array of shape (n + 1,), the cash flows of price i are offsets[i]:offsets[i+1]
+        Output:
+        - z-spread of each price
+        - mask of the prices that converged
         """
 
-        # filter the coupon dates, only keep ones after the target date
-        coupon_dates = [target_date] + [
-            date
-            for date in self.__coupon_dates
-            if date >= target_date
-        ]
+        n = len(prices)
+        segment = np.repeat(np.arange(n), np.diff(offsets))
 
-        # compute the cash flows
-        cash_flows = [
-            self.__coupon_rate * yearfrac(date, coupon_dates[i+1], 'EU_30_360')
-            for i, date in enumerate(coupon_dates[:-1])
-        ]
+        z = np.zeros(n)
+        active = np.ones(n, dtype=bool)
 
-        # add the principal
-        cash_flows[-1] += 100
+        for _ in range(max_iter):
+            # cash flows of the prices still iterating
+            flows = active[segment]
+            discounted = cash_flows[flows] * np.exp((-z[segment[flows]] - f[flows]) * x[flows])
 
-        return pd.DataFrame({
-            'Date': coupon_dates[1:],
-            'Cash Flow': cash_flows
-        })
+            # price and derivative of the cash flows
+            price = np.bincount(segment[flows], discounted, minlength=n)[active]
+            derivative = -np.bincount(segment[flows], discounted * x[flows], minlength=n)[active]
 
-    def z_spread(self, bootstrapper)->pd.DataFrame:
+            # Newton step
+            step = (price - prices[active]) / derivative
+            z[active] -= step
+
+            # stop iterating on the prices that converged (or diverged)
+            done = (np.abs(step) < tol) | ~np.isfinite(step)
+            active[np.flatnonzero(active)[done]] = False
+
+            if not active.any():
+                break
+
+        converged = np.isfinite(z) & ~active
+
+        return z, converged
+
+    @staticmethod
+    def secant_z_spread(cash_flows:np.ndarray, x:np.ndarray, f:np.ndarray, price:float,
+        prev_z:float)->float:
         """
-        Compute the Z-spread of the bond.
+        Find the z-spread of a single price with the secant method, starting from prev_z.
+        """
+
+        return root_scalar(lambda z:
+            np.sum(cash_flows * np.exp( (-z -f) * x))
+            -
+            price,
+            x0 = prev_z, x1 = prev_z + 0.01, method='secant'
+        ).root
+
+    @staticmethod
+    def solve_panel(curve, rows:np.ndarray, counts:np.ndarray, cash_flows:np.ndarray,
+        x:np.ndarray, prices:np.ndarray, bond_index:np.ndarray, date_index:np.ndarray)->np.ndarray:
+        """
+        Find the z-spreads of a panel of prices of one or more bonds, sorted by bond and date.
         Input:
-        - bootstrapper: Bootstrapper object with the OIS rates.
+        - curve: CurveLookup with the bootstrapped zero rates
+        - rows: row of the curve of each price
+        - counts: number of cash flows of each price
+        - cash_flows, x: flat cash flows and their ACT_365 year fractions
+        - prices: dirty prices
+        - bond_index, date_index: bond and date of each price
+        Output:
+        - z-spread of each price
         """
 
-        # if already computed, return
-        if self.__z_spread is not None:
-            return self.__z_spread
+        offsets = np.concatenate([[0], np.cumsum(counts)])
 
-        z_spread = pd.DataFrame()
-        z_spread['Date'] = self.__data['Date']
+        # interpolate the zero rates of each date at the cash flow dates
+        f = curve.interpolate(np.repeat(rows, counts), x)
 
-        # wherever we don't have data, we put 0 (float)
-        z_spread[self.__code] = 0.0
+        # find all the z-spreads at once
+        z, converged = Bond.solve_z_spreads(cash_flows, x, f, prices, offsets)
+        z = np.where(converged, z, 0.0)
+
+        # fall back to the secant method where Newton failed, starting from the z-spread of the
+        # bond on the previous date (0 if it is not quoted on that date)
+        for i in np.flatnonzero(~converged):
+            previous = i > 0 and bond_index[i - 1] == bond_index[i] and \
+                date_index[i - 1] == date_index[i] - 1
+            prev_z = z[i - 1] if previous else 0.0
+            flows = slice(offsets[i], offsets[i + 1])
+            z[i] = Bond.secant_z_spread(cash_flows[flows], x[flows], f[flows], prices[i], prev_z)
 
-        # pad the zero rates. HACK this relies on pseudo-private method
-        yf = bootstrapper._Bootstrap__pad_yf(self.__data['Date'])
-        zero_rates = bootstrapper._Bootstrap__pad_zero_rates(self.__data['Date'])
+        return z
 
-        # iterate over the data
-        for i, row in self.__data.dropna().iterrows():
+    def __compute_z_spread(self, curve)->np.ndarray:
+        """
+        Compute the Z-spread of the bond at every date of the data (0 where it is not quoted).
+        Input:
+        - curve: CurveLookup with the bootstrapped zero rates.
+        """
 
-            target_date = row['Date']
+        values = np.zeros(len(self.__dates))
 
-            # compute the cash flows
-            cash_flows = self.__compute_cash_flows(target_date)
+        # cash flows of all the quoted dates
+        positions, prices, counts, cash_flows, x = self.cash_flows()
 
-            # compute the dates
-            x = yearfrac(target_date, cash_flows['Date'], 'ACT_365').values.astype(float)
+        dates = self.__dates[positions].view('datetime64[ns]')
+        rows = curve.rows(dates)
+        # dates before the curve have no row (-1), they must not be priced on another curve
+        if (rows < 0).any():
+            raise KeyError(f'The date {dates[rows < 0][0]} of the bond {self.__code} is before '
+                'the start of the curve')
 
-            # check that the max be less than 0.0075
-            if np.max(x) < 0.075:
-                continue
+        # solve the quoted dates as a panel of this bond alone (the dates are its rows)
+        values[positions] = self.solve_panel(curve, rows, counts, cash_flows, x, prices,
+            np.zeros(len(positions), dtype=int), positions)
 
-            # get the zero rates for the date
-            xp = yf[yf['Date'] == target_date].iloc[0, 1:].values.astype(float)
-            fp = zero_rates[zero_rates['Date'] == target_date].iloc[0, 1:].values.astype(float)
+        return values
 
-            # interpolate the zero rates
-            f = np.interp(x, xp, fp)
+    def z_spread(self, bootstrapper)->pd.DataFrame:
+        """
+        Compute the Z-spread of the bond.
+        Input:
+        - bootstrapper: Bootstrapper object with the OIS rates.
+        """
 
-            # find the previous value of the z-spread
-            try:
-                prev_z = z_spread[z_spread['Date'] < target_date].iloc[-1, 1]
-            except IndexError: # catch in case we have to start from the first date
-                prev_z = 0.0
+        # if already computed, return
+        if self.__z_spread is not None:
+            return self.__z_spread
 
-            # find the z-spread that makes the price equal to the bond price
-            z = root_scalar(lambda z:
-                np.sum(cash_flows['Cash Flow'].values * np.exp( (-z -f) * x)) 
-                -
-                row[self.__code],
-                x0 = prev_z, x1 = prev_z + 0.01, method='secant'
-            ).root
+        z_spread = pd.DataFrame()
+        z_spread['Date'] = self.dates()
 
-            z_spread.loc[z_spread['Date'] == target_date, self.__code] = z
+        # wherever we don't have data, we put 0 (float)
+        z_spread[self.__code] = self.__compute_z_spread(bootstrapper.lookup())
 
         # rename the column
         z_spread = z_spread.rename(columns={self.__code: 'Z-spread'})
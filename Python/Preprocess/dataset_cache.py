@@ -0,0 +1,181 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Feather needs pyarrow, without it the datasets are saved as .npz files (one array per column)
+try:
+    import pyarrow
+    FORMAT = 'feather'
+except ImportError:
+    FORMAT = 'npz'
+
+class DatasetCache:
+    """
+    On-disk cache of the preprocessed datasets.
+    Each dataset is saved in a columnar file next to a manifest with the modification time, size
+    and sha256 of the source files it was built from. A dataset is reused only if its sources are
+    unchanged: the modification time is checked first, and the content hash when it differs.
+    """
+
+    def __init__(self, directory:str):
+        """
+        Constructor for the DatasetCache class
+        :param directory: directory of the cache
+        """
+
+        self.__directory = directory
+
+        # if the directory does not exist, create it
+        if not os.path.exists(self.__directory):
+            os.makedirs(self.__directory)
+
+    def load(self, name:str, sources:list[str], params:str = '')->pd.DataFrame | None:
+        """
+        Return the dataset saved under the name, None if it is missing or stale
+        :param name: name of the dataset
+        :param sources: paths of the files the dataset is built from
+        :param params: string with the parameters the dataset is built with
+        """
+
+        try:
+            with open(self.__manifest_path(name), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if manifest['params'] != params or manifest['format'] != FORMAT or \
+            sorted(manifest['sources']) != sorted(self.__normalize(sources)):
+            return None
+
+        # check the sources, hashing only the ones that were touched
+        touched = False
+        for path, info in manifest['sources'].items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if stat.st_mtime_ns == info['mtime'] and stat.st_size == info['size']:
+                continue
+            if self.__hash(path) != info['sha256']:
+                return None
+            info['mtime'], info['size'] = stat.st_mtime_ns, stat.st_size
+            touched = True
+
+        try:
+            data = self.__read(name)
+        except (OSError, KeyError, ValueError):
+            return None
+
+        # the content did not change, remember the new modification times
+        if touched:
+            self.__write_manifest(name, manifest)
+
+        return data
+
+    def save(self, name:str, sources:list[str], data:pd.DataFrame, params:str = '')->None:
+        """
+        Save the dataset under the name
+        :param name: name of the dataset
+        :param sources: paths of the files the dataset is built from
+        :param data: DataFrame with the dataset (the index is saved too)
+        :param params: string with the parameters the dataset is built with
+        """
+
+        manifest = {
+            'params': params,
+            'format': FORMAT,
+            'sources': {
+                path: {
+                    'mtime': os.stat(path).st_mtime_ns,
+                    'size': os.stat(path).st_size,
+                    'sha256': self.__hash(path)
+                }
+                for path in self.__normalize(sources)
+            }
+        }
+
+        self.__write(name, data)
+        self.__write_manifest(name, manifest)
+
+    @staticmethod
+    def __normalize(sources:list[str])->list[str]:
+        """
+        Absolute paths of the sources
+        """
+        return [os.path.abspath(path) for path in sources]
+
+    @staticmethod
+    def __hash(path:str)->str:
+        """
+        sha256 of the content of the file
+        """
+
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+
+        return h.hexdigest()
+
+    def __manifest_path(self, name:str)->str:
+        """
+        Path of the manifest of the dataset
+        """
+        return os.path.join(self.__directory, f'{name}.json')
+
+    def __data_path(self, name:str)->str:
+        """
+        Path of the data of the dataset
+        """
+        return os.path.join(self.__directory, f'{name}.{FORMAT}')
+
+    def __write_manifest(self, name:str, manifest:dict)->None:
+        """
+        Write the manifest of the dataset (through a temporary file)
+        """
+
+        path = self.__manifest_path(name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def __write(self, name:str, data:pd.DataFrame)->None:
+        """
+        Write the columns and the index of the dataset (through a temporary file)
+        """
+
+        path = self.__data_path(name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+
+        # keep the index as a column, so the dataset comes back exactly as it was saved
+        columns = {'__index__': data.index.to_numpy()}
+        columns.update({str(column): data[column].to_numpy() for column in data.columns})
+
+        if FORMAT == 'feather':
+            pd.DataFrame(columns).to_feather(tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, __columns__=np.array(list(columns)), **columns)
+
+        os.replace(tmp_path, path)
+
+    def __read(self, name:str)->pd.DataFrame:
+        """
+        Read the columns and the index of the dataset
+        """
+
+        path = self.__data_path(name)
+
+        if FORMAT == 'feather':
+            columns = pd.read_feather(path)
+            columns = {column: columns[column].to_numpy() for column in columns.columns}
+        else:
+            with np.load(path, allow_pickle=False) as f:
+                columns = {column: f[column] for column in f['__columns__']}
+
+        index = columns.pop('__index__')
+
+        return pd.DataFrame(columns, index=index)
@@ -0,0 +1,183 @@
+import os
+import datetime
+import numpy as np
+import pandas as pd
+
+def december_expiry(years:np.ndarray | int)->np.ndarray:
+    """
+    Expiry calendar of the December contracts: the first Monday on or after the 14th of December
+    (the rule followed by all the contracts that expired in the data, from 2009 to 2021).
+    """
+
+    fourteenth = (np.asarray(years) - 1970).astype('datetime64[Y]') + np.timedelta64(11, 'M')
+    fourteenth = fourteenth.astype('datetime64[D]') + np.timedelta64(13, 'D')
+
+    return np.busday_offset(fourteenth, 0, roll='forward', weekmask='Mon').astype('datetime64[ns]')
+
+class FuturesStore:
+    """
+    All the December futures contracts in one long table.
+    The ICE_FUT_{yy}.csv files are read once into a table with the contract year, date, price and
+    volume of every quote, and each contract gets its last traded date (last volume) and expiry.
+    The expiry is the last quoted date for the contracts that expired in the data, the expiry
+    calendar for the ones still trading at its end, unless it is overridden. Continuous series at
+    any depth are then selected with joins on this table.
+    """
+
+    def __init__(self, directory:str, expiry_overrides:dict = None):
+        """
+        Constructor for the FuturesStore class
+        :param directory: directory with the ICE_FUT_{yy}.csv files
+        :param expiry_overrides: dict with the expiry of some contracts (by year), replacing the
+            one from the data or the calendar. Default is None (no overrides)
+        """
+
+        self.__directory = directory
+
+        # long table of the quotes, indexed by the row in the file of the contract
+        self.__quotes = self.__read()
+
+        # last traded date and last quoted date of each contract
+        self.__contracts = pd.DataFrame({
+            'Last_Quote': self.__quotes.loc[self.__quotes['VOLUME'].notnull()].groupby('Year')['Date'].max(),
+            'Expiry': self.__quotes.loc[self.__quotes['CLOSE'].notnull()].groupby('Year')['Date'].max()
+        })
+
+        # the contracts quoted until the end of the data did not expire yet, use the calendar
+        trading = self.__contracts['Expiry'] >= self.__quotes['Date'].max()
+        self.__contracts.loc[trading, 'Expiry'] = december_expiry(self.__contracts.index[trading])
+
+        # override the expiries
+        for year, expiry in (expiry_overrides or {}).items():
+            if year in self.__contracts.index:
+                self.__contracts.loc[year, 'Expiry'] = pd.Timestamp(expiry)
+
+    def __read(self)->pd.DataFrame:
+        """
+        Read all the contracts into the long table
+        """
+
+        quotes = []
+        for file_name in sorted(os.listdir(self.__directory)):
+
+            if not (file_name.startswith('ICE_FUT_') and file_name.endswith('.csv')):
+                continue
+
+            path = os.path.join(self.__directory, file_name)
+            columns = ['Date', 'CLOSE', 'VOLUME']
+            # some files use the European csv format
+            try:
+                contract = pd.read_csv(path, usecols=columns, parse_dates=['Date'])
+            except ValueError:
+                contract = pd.read_csv(path, usecols=columns, parse_dates=['Date'], sep=';',
+                    decimal=',')
+
+            # the two digits of the name are the year of the contract
+            contract.insert(0, 'Year', 2000 + int(file_name[len('ICE_FUT_'):-len('.csv')]))
+            quotes.append(contract)
+
+        return pd.concat(quotes)
+
+    def __held(self, depths:np.ndarray, first_date:datetime.datetime,
+        last_date:datetime.datetime)->pd.DataFrame:
+        """
+        Quotes of the contracts held at the given depths, with their 'Depth' and sorted by depth,
+        front year and date
+        """
+
+        years = np.arange(first_date.year, last_date.year + 1)
+
+        # holding window of each front year
+        end = self.__contracts['Last_Quote'].reindex(years).to_numpy()
+        start = np.concatenate([[np.datetime64(first_date, 'ns')], end[:-1]])
+
+        # window of every (depth, front year), keyed by the year of the held contract
+        windows = pd.DataFrame({
+            'Year': (years[None, :] + depths[:, None]).ravel(),
+            'Depth': np.repeat(depths, len(years)),
+            'Order': np.tile(np.arange(len(years)), len(depths)),
+            'Start': np.tile(start, len(depths)),
+            'End': np.tile(end, len(depths))
+        })
+
+        # join the quotes of the held contracts with their window
+        quotes = self.__quotes.reset_index().merge(windows, on='Year')
+        quotes = quotes.loc[(quotes['Date'] >= quotes['Start']) & (quotes['Date'] < quotes['End'])]
+
+        return quotes.sort_values(['Depth', 'Order', 'Date'], kind='stable')
+
+    def strip(self, depth:int, first_date:datetime.datetime,
+        last_date:datetime.datetime)->pd.DataFrame:
+        """
+        All the December contracts from the front to depth years after it, aligned by date.
+        Input:
+        - depth: integer with the depth of the last contract (0 is the front only).
+        - first_date: datetime object with the first date to consider.
+        - last_date: datetime object with the last date to consider.
+        Output:
+        - DataFrame indexed by 'Date' with the columns ('Price', k), ('Volume', k) and ('Expiry', k)
+            for k from 0 to depth (NaN where the contract is not quoted).
+        """
+
+        quotes = self.__held(np.arange(depth + 1), first_date, last_date)
+
+        panel = pd.DataFrame({
+            'Date': quotes['Date'].to_numpy(),
+            'Depth': quotes['Depth'].to_numpy(),
+            'Price': quotes['CLOSE'].to_numpy(),
+            # fill the NaN values of the volume with 0
+            'Volume': quotes['VOLUME'].fillna(0).to_numpy(),
+            'Expiry': self.__contracts['Expiry'].reindex(quotes['Year']).to_numpy()
+        })
+
+        # one row per date and one column per field and depth (pivoted by field to keep the dtypes)
+        fields = ['Price', 'Volume', 'Expiry']
+        return pd.concat([
+            panel.pivot(index='Date', columns='Depth', values=field).reindex(columns=range(depth + 1))
+            for field in fields
+        ], axis=1, keys=fields)
+
+    def contracts(self)->pd.DataFrame:
+        """
+        Return the last traded date and the expiry of each contract (indexed by year)
+        """
+        return self.__contracts.copy()
+
+    def last_quote(self, year:int)->datetime.datetime:
+        """
+        Return the last date the contract of the year was traded
+        """
+        return self.__contracts.loc[year, 'Last_Quote']
+
+    def expiry(self, year:int)->datetime.datetime:
+        """
+        Return the expiry of the contract of the year
+        """
+        return self.__contracts.loc[year, 'Expiry']
+
+    def continuous(self, years_offset:int, first_date:datetime.datetime,
+        last_date:datetime.datetime)->pd.DataFrame:
+        """
+        Continuous series of the December contract years_offset years after the front one.
+        The front contract of a year is held from the last traded date of the previous front
+        (first_date for the first year) until its own last traded date (excluded).
+        Input:
+        - years_offset: integer with the depth of the contract (0 is the front).
+        - first_date: datetime object with the first date to consider.
+        - last_date: datetime object with the last date to consider.
+        Output:
+        - DataFrame with the columns 'Date', 'Volume', 'Price' and 'Expiry', indexed by the row of
+            the quote in the file of its contract.
+        """
+
+        quotes = self.__held(np.array([years_offset]), first_date, last_date)
+
+        series = pd.DataFrame({
+            'Date': quotes['Date'].to_numpy(),
+            # fill the NaN values of the volume with 0
+            'Volume': quotes['VOLUME'].fillna(0).to_numpy(),
+            'Price': quotes['CLOSE'].to_numpy(),
+            'Expiry': self.__contracts['Expiry'].reindex(quotes['Year']).to_numpy()
+        }, index=quotes['index'].to_numpy())
+
+        return series
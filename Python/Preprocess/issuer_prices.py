@@ -0,0 +1,136 @@
+import os
+import sys
+import hashlib
+import concurrent.futures
+import numpy as np
+import pandas as pd
+
+class IssuerPrices:
+    """
+    Cache of the bond prices of the issuers.
+    Each issuer csv is read once into a (dates x bonds) matrix stored column by column, so the
+    price history of a bond is a view of one of its columns. The matrices can be aligned to a
+    set of dates when they are loaded, and the cache can be released when the bonds are built:
+    the matrices then live only as long as the bonds viewing them.
+    """
+
+    def __init__(self, directory:str):
+        """
+        Constructor for the IssuerPrices class
+        :param directory: directory with the csv files of the issuers
+        """
+
+        self.__directory = directory
+
+        # issuer -> (dates, column of each bond, price matrix)
+        self.__matrices = {}
+
+        # dates the matrices are aligned to (None to keep all the dates of the files)
+        self.__dates = None
+
+        # DatasetCache of the aligned prices (None to always read the files)
+        self.__cache = None
+
+    def __contains__(self, issuer:str)->bool:
+        """
+        Check if the prices of the issuer are in the cache
+        """
+        return issuer in self.__matrices
+
+    def get(self, issuer:str)->tuple[np.ndarray, dict[str, int], np.ndarray]:
+        """
+        Return the prices of the issuer, reading its csv file if it is not in the cache
+        Output:
+        - dates: sorted int64 array with the dates (nanoseconds since epoch)
+        - columns: dict with the column of each bond in the matrix
+        - prices: (dates x bonds) float64 matrix in column-major order
+        """
+
+        if issuer not in self.__matrices:
+            self.__matrices[issuer] = self.__read(issuer)
+
+        return self.__matrices[issuer]
+
+    def load(self, issuers:list[str], dates:pd.Series = None, cache = None, workers:int = None
+        )->None:
+        """
+        Read the csv files of the issuers in parallel threads
+        :param issuers: tickers of the issuers
+        :param dates: dates to keep in the matrices. Default is None (all the dates of the files)
+        :param cache: DatasetCache where the aligned prices are kept. Default is None (no cache)
+        :param workers: number of threads. Default is None (chosen by concurrent.futures)
+        """
+
+        if dates is not None:
+            dates = np.unique(pd.Series(dates).to_numpy(dtype='datetime64[ns]').astype(np.int64))
+        self.__dates = dates
+        self.__cache = cache
+
+        issuers = list(dict.fromkeys(issuers))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            matrices = list(executor.map(self.__read, issuers))
+
+        self.__matrices.update(zip(issuers, matrices))
+
+    def release(self, issuer:str = None)->None:
+        """
+        Remove the issuer from the cache (all the issuers if None)
+        """
+
+        if issuer is None:
+            self.__matrices.clear()
+        else:
+            self.__matrices.pop(issuer, None)
+
+    def __read(self, issuer:str)->tuple[np.ndarray, dict[str, int], np.ndarray]:
+        """
+        Read the csv file of the issuer into a price matrix
+        """
+
+        path = os.path.join(self.__directory, f'{issuer}.csv')
+
+        # look for the aligned prices in the cache
+        # the prices depend on the csv file and on the code reading and caching them
+        sources = [path, __file__]
+        if self.__cache is not None:
+            sources.append(sys.modules[type(self.__cache).__module__].__file__)
+        params = '' if self.__dates is None else hashlib.sha256(self.__dates.tobytes()).hexdigest()
+        data = None if self.__cache is None else self.__cache.load(f'Bonds_{issuer}', sources, params)
+
+        if data is None:
+            data = self.__read_csv(path)
+            if self.__cache is not None:
+                self.__cache.save(f'Bonds_{issuer}', sources, data, params)
+
+        dates = data['Date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        codes = data.columns.drop('Date')
+        prices = np.asfortranarray(data[codes].to_numpy(dtype=np.float64))
+
+        # the matrices are shared by the bonds, nobody should write into them
+        dates.flags.writeable = False
+        prices.flags.writeable = False
+
+        return dates, {code: i for i, code in enumerate(codes)}, prices
+
+    def __read_csv(self, path:str)->pd.DataFrame:
+        """
+        Read the csv file of an issuer, sorted by date and aligned to the dates
+        """
+
+        # read the header to skip the first and second columns and type the price columns
+        columns = pd.read_csv(path, nrows=0).columns
+        codes = columns[2:].drop('Date')
+
+        data = pd.read_csv(path, usecols=columns[2:], dtype={code: np.float64 for code in codes},
+            parse_dates=['Date'], date_format='%m/%d/%Y')
+        # sort by date (the bonds slice their date range)
+        data = data.sort_values('Date')
+
+        dates = data['Date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        # keep only the dates the matrices are aligned to
+        if self.__dates is not None:
+            data = data.loc[np.isin(dates, self.__dates)]
+
+        return data.reset_index(drop=True)
@@ -1,4 +1,5 @@
 import os
+import sys
 import datetime
 import numpy as np
 import pandas as pd
@@ -6,8 +7,12 @@ import pandas as pd
 # import the Bond class from the bond.py file
 if __name__ == '__main__':
     from bond import Bond
+    from dataset_cache import DatasetCache
+    from futures_store import FuturesStore
 else:
     from preprocess.bond import Bond
+    from preprocess.dataset_cache import DatasetCache
+    from preprocess.futures_store import FuturesStore
 
 # preprocessor
 class Preprocessor:
@@ -17,16 +22,19 @@ class Preprocessor:
 
     __instance = None
 
-    def __new__(cls):
+    def __new__(cls, *args, **kwargs):
         if cls.__instance is None:
             cls.__instance = super(Preprocessor, cls).__new__(cls)
             cls.__instance.__initialized = False
         return cls.__instance
 
     def __init__(self, data_dir:str = '../Data/', preprocessed_dir:str = 'Preprocess/Preprocessed/',
-        futures_dir:str = 'Futures/', bonds_dir:str = 'Bonds/'):
+        futures_dir:str = 'Futures/', bonds_dir:str = 'Bonds/', lazy:bool = False):
         """
         Constructor for the Preprocessor class.
+        Input:
+        - lazy: if True, the datasets are not loaded here but on their first access (together with
+            the datasets they depend on). Default is False (load all the data).
         """
 
         if self.__initialized:
@@ -37,6 +45,13 @@ class Preprocessor:
         self.__PHASE_III_END = datetime.datetime(2021, 1, 1)
         self.__PHASE_IV_END = datetime.datetime(2022, 10, 28)
 
+        # expiries of the futures that go beyond the end of the data (the others follow the calendar)
+        self.__EXPIRY_OVERRIDES = {
+            2022: datetime.datetime(2022, 12, 19),
+            2023: datetime.datetime(2023, 12, 18),
+            2024: datetime.datetime(2024, 12, 23)
+        }
+
         # create a module level variable for the directories
         self.__data_dir = '../Data/'
         self.__preprocessed_dir = os.path.join(os.path.dirname(__file__), 'Preprocessed/')
@@ -45,10 +60,15 @@ class Preprocessor:
 
         # save the data inside the object
         self.__data = {}
+        # cache of the preprocessed datasets, reused while their source files do not change
+        self.__cache = DatasetCache(self.__preprocessed_dir)
+        # futures contracts (read on first use)
+        self.__futures = None
         # date to consider for the data
         self.__dates = None
-        # call the function to find the relevant dates
-        self.relevant_dates()
+        # True while the relevant dates are being computed (the datasets they come from are not
+        # filtered yet)
+        self.__resolving_dates = False
 
         # check that the directories exist
         if not os.path.exists(self.__data_dir):
@@ -61,8 +81,9 @@ class Preprocessor:
         if not os.path.exists(self.__preprocessed_dir):
             os.makedirs(self.__preprocessed_dir)
         
-        # load all the data
-        self.load_data()
+        # load all the data (unless it is loaded on demand)
+        if not lazy:
+            self.load_data()
 
         self.__initialized = True
     
@@ -96,19 +117,123 @@ class Preprocessor:
         # print the time taken in seconds
         print(f'Time taken to load the data: {(end_time - start_time).total_seconds()} s')
 
-    def relevant_dates(self):
+    def __sources(self, *file_names:str)->list[str]:
+        """
+        Paths of the data files a dataset is built from, plus the code that builds and caches the
+        datasets: this file (with the expiry overrides), futures_store.py (with the expiry
+        calendar) and dataset_cache.py.
+        Input:
+        - file_names: names of the files relative to the data directory.
+        """
+
+        code = [__file__] + [
+            sys.modules[cls.__module__].__file__ for cls in (FuturesStore, DatasetCache)
+        ]
+
+        return [os.path.join(self.__data_dir, file_name) for file_name in file_names] + code
+
+    def __futures_files(self)->list[str]:
+        """
+        Names of the files of the futures contracts, relative to the data directory.
+        """
+        return [
+            os.path.join(self.__futures_dir, file_name)
+            for file_name in sorted(os.listdir(os.path.join(self.__data_dir, self.__futures_dir)))
+            if file_name.startswith('ICE_FUT_')
+        ]
+
+    def __dates_sources(self, *file_names:str)->list[str]:
+        """
+        Sources of a dataset filtered on the relevant dates (which come from the futures files and
+        the daily price).
+        """
+        return self.__sources('Daily_Future.csv', *self.__futures_files(), *file_names)
+
+    def futures(self)->FuturesStore:
+        """
+        Return the store with all the December futures contracts (read once).
+        """
+
+        if self.__futures is None:
+            self.__futures = FuturesStore(os.path.join(self.__data_dir, self.__futures_dir),
+                self.__EXPIRY_OVERRIDES)
+        return self.__futures
+
+    def preprocess_strip(self, depth:int = 2, first_date:datetime.datetime = None,
+        last_date:datetime.datetime = None)->pd.DataFrame:
+        """
+        Preprocess all the December futures contracts from the Front to depth years after it.
+        Input:
+        - depth: integer with the depth of the last contract. Default is 2 (Front, Next, Next_2).
+        - first_date: datetime object with the first date to consider. Default is the start of Phase III.
+        - last_date: datetime object with the last date to consider. Default is the end of Phase IV.
+        Output:
+        - DataFrame with the column 'Date' and the columns ('Price', k), ('Volume', k) and
+            ('Expiry', k) for k from 0 to depth.
+        """
+
+        # assign the default values for the dates
+        first_date = first_date if first_date is not None else self.__PHASE_III_START
+        last_date = last_date if last_date is not None else self.__PHASE_IV_END
+
+        strip = self.futures().strip(depth, first_date, last_date)
+
+        # filter the data to only keep the relevant dates
+        strip = strip.loc[self.date_codes(strip.index) >= 0]
+
+        return strip.reset_index()
+
+    def relevant_dates(self)->pd.DatetimeIndex:
         """
         Function to find the relevant dates for the data.
+        Output:
+        - sorted DatetimeIndex with the unique dates where both the Front and the daily price are
+            quoted.
         """
 
         if self.__dates is None:
+
+            # look for the dates in the cache
+            cached = self.__cache.load('Relevant_Dates', self.__dates_sources())
+            if cached is not None:
+                self.__dates = pd.DatetimeIndex(cached['Date'].to_numpy())
+                return self.__dates
+
             # find the common dates between the futures and the daily price
-            Daily_Price = self.preprocess_daily_price()
-            Front = self.preprocess_December()
-            common_dates = set(Daily_Price['Date']).intersection(set(Front['Date']))
-            self.__dates = pd.Series(list(common_dates), index=range(len(common_dates)))
+            self.__resolving_dates = True
+            try:
+                Daily_Price = self.preprocess_daily_price()
+                Front = self.preprocess_December()
+            finally:
+                self.__resolving_dates = False
+            # intersect1d returns the dates sorted and unique
+            self.__dates = pd.DatetimeIndex(np.intersect1d(
+                Daily_Price['Date'].to_numpy(dtype='datetime64[ns]'),
+                Front['Date'].to_numpy(dtype='datetime64[ns]')
+            ))
+
+            self.__cache.save('Relevant_Dates', self.__dates_sources(),
+                pd.DataFrame({'Date': self.__dates}))
         return self.__dates
 
+    def date_codes(self, dates:pd.Series | pd.DatetimeIndex | np.ndarray)->np.ndarray:
+        """
+        Position of each date in the relevant dates (-1 for the dates that are not relevant), so
+        the datasets can be aligned with array indexing instead of hashing the dates.
+        Input:
+        - dates: dates to look up.
+        Output:
+        - int64 array with the position of each date.
+        """
+
+        relevant = self.relevant_dates().to_numpy()
+        dates = pd.Series(dates).to_numpy(dtype='datetime64[ns]')
+
+        # binary search in the sorted relevant dates
+        codes = np.minimum(np.searchsorted(relevant, dates), len(relevant) - 1)
+
+        return np.where(relevant[codes] == dates, codes, -1)
+
     def preprocess_Volumes_front_Month(self, month:str, first_date:datetime.datetime = None, 
         last_date:datetime.datetime = None)->pd.DataFrame:
         """
@@ -134,6 +259,14 @@ class Preprocessor:
         if month.capitalize() not in ['March', 'June', 'September']:
             raise ValueError('The month should be either "March", "June" or "September".')
 
+        # look for the data in the cache
+        sources = self.__sources('Volumes_extra_futures.xlsx')
+        params = f'{first_date}|{last_date}'
+        cached = self.__cache.load('Volumes_' + month, sources, params)
+        if cached is not None:
+            self.__data['Volumes_' + month] = cached
+            return cached.reset_index(drop=True)
+
         extra_futures = pd.read_excel(
             os.path.join(self.__data_dir, 'Volumes_extra_futures.xlsx'),
             sheet_name=month)
@@ -169,8 +302,9 @@ class Preprocessor:
             # update the previous date
             prev_date = next_date
 
-        # save the data inside the object
+        # save the data inside the object and in the cache
         self.__data['Volumes_' + month] = Volumes
+        self.__cache.save('Volumes_' + month, sources, Volumes, params)
 
         # reindex the data
         Volumes = Volumes.reset_index(drop=True)
@@ -182,110 +316,58 @@ class Preprocessor:
         """
         Function to preprocess the data of the volumes of the futures contracts in December.
         Input:
-        - years_offset: integer with the number of years to go back from the current year.
+        - years_offset: integer with the number of years after the front contract (0 is the Front,
+            1 the Next, k the Next_k).
         - first_date: datetime object with the first date to consider. Default is the start of Phase III.
         - last_date: datetime object with the last date to consider. Default is the end of Phase IV.
         Output:
         - DataFrame with the columns 'Date', 'Volume', 'Price' and 'Expiry'.
         """
 
+        if years_offset < 0:
+            raise ValueError('The years offset should be a non negative integer.')
+
         names = {
             0: 'Front',
-            1: 'Next',
-            2: 'Next_2'
+            1: 'Next'
         }
 
-        name = names.get(years_offset)
-
-        if name is None:
-            raise ValueError('The years offset should be either 0, 1 or 2.')
+        name = names.get(years_offset, f'Next_{years_offset}')
 
         # check if the data has already been loaded
-        if self.__data.get(names[years_offset]) is not None:
-            return self.__data[names[years_offset]]
+        if self.__data.get(name) is not None:
+            return self.__data[name]
 
         # assign the default values for the dates
         first_date = first_date if first_date is not None else self.__PHASE_III_START
         last_date = last_date if last_date is not None else self.__PHASE_IV_END
 
-        # initialize the DataFrame
-        front_Dec = pd.DataFrame()
-        prev_date = first_date
+        # the data is filtered on the relevant dates, resolve them first
+        if self.__dates is None and not self.__resolving_dates:
+            self.relevant_dates()
 
-        years = range(first_date.year, last_date.year + 1)
+        # look for the data in the cache (only once the relevant dates are known)
+        sources = self.__dates_sources()
+        params = f'{first_date}|{last_date}'
+        if self.__dates is not None:
+            cached = self.__cache.load(name, sources, params)
+            if cached is not None:
+                self.__data[name] = cached
+                return cached.reset_index(drop=True)
 
-        for year in years:
-
-            # find the last quoted date
-            file_name = f'ICE_FUT_{str(year)[-2:]}.csv'
-            # open the corresponding file (read the Dates as dates and the VOLUME as float)
-            front_volumes = pd.read_csv(os.path.join(self.__data_dir, self.__futures_dir, file_name),
-                usecols=['Date', 'CLOSE', 'VOLUME'], parse_dates=['Date'])
-            # find the last quoted date (expiry date) as the last date where there is a value in the column
-            next_date = front_volumes.loc[front_volumes['VOLUME'].notnull(), 'Date'].max()
-
-            # if there is an offset, we need to find the corresponding file
-            if years_offset > 0:
-                file_name = f'ICE_FUT_{str(year + years_offset)[-2:]}.csv'
-                selected_data = pd.read_csv(os.path.join(self.__data_dir, self.__futures_dir, file_name),
-                    usecols=['Date', 'CLOSE', 'VOLUME'], parse_dates=['Date'])
-            else:
-                selected_data = front_volumes
-            # find the expiry as the last quoted date
-            expiry_date = selected_data.loc[selected_data['CLOSE'].notnull(), 'Date'].max()
-            # select the needed data
-            selected_data = selected_data.loc[selected_data['Date'] >= prev_date].loc[
-                selected_data['Date'] < next_date, ['Date', 'VOLUME', 'CLOSE']]
-            # select only the date and the volume
-            selected_data = pd.DataFrame(
-                {
-                    'Date': selected_data['Date'],
-                    'Volume': selected_data['VOLUME'], 
-                    'Price': selected_data['CLOSE']
-                }
-            )
-            # fill the NaN values of the volume with 0
-            selected_data['Volume'] = selected_data['Volume'].fillna(0)
-            # add the expiry date to the DataFrame
-            selected_data['Expiry'] = expiry_date
-            # add the date to the DataFrame
-            front_Dec = pd.concat([front_Dec, selected_data])
-            # update the previous date
-            prev_date = next_date
+        # select the contracts from the futures store
+        front_Dec = self.futures().continuous(years_offset, first_date, last_date)
 
-        # manually adjust the expiries of futures that go beyond the end of the data
-        if years_offset == 0:
-            front_expiry = datetime.datetime(2022, 12, 19)
-            front_Dec.loc[front_Dec['Expiry'] == self.__PHASE_IV_END, 'Expiry'] = front_expiry
-        elif years_offset == 1:
-            third_from_last_expiry = datetime.datetime(2020, 12, 14)
-            penultimate_expiry = datetime.datetime(2021, 12, 20)
-            front_expiry = datetime.datetime(2022, 12, 19)
-            next_expiry = datetime.datetime(2023, 12, 18)
-            front_Dec.loc[(front_Dec['Date'] >= third_from_last_expiry) &
-                (front_Dec['Date'] < penultimate_expiry), 'Expiry'] = front_expiry
-            front_Dec.loc[front_Dec['Date'] >= penultimate_expiry, 'Expiry'] = next_expiry
-        elif years_offset == 2:
-            third_from_last_expiry = datetime.datetime(2020, 12, 14)
-            penultimate_expiry = datetime.datetime(2021, 12, 20)
-            front_expiry = datetime.datetime(2022, 12, 19)
-            next_expiry = datetime.datetime(2023, 12, 18)
-            next_2_expiry = datetime.datetime(2024, 12, 23)
-            front_Dec.loc[(front_Dec['Date'] >= third_from_last_expiry) &
-                (front_Dec['Date'] < penultimate_expiry), 'Expiry'] = front_expiry
-            front_Dec.loc[(front_Dec['Date'] >= penultimate_expiry) &
-                (front_Dec['Date'] < penultimate_expiry), 'Expiry'] = next_expiry
-            front_Dec.loc[front_Dec['Date'] >= penultimate_expiry, 'Expiry'] = next_2_expiry
-        
         # if the dates are not defined, simply return the data
         if self.__dates is None:
             return front_Dec
         
         # filter the data to only keep the dates in the front
-        front_Dec = front_Dec.loc[front_Dec['Date'].isin(self.relevant_dates())]
+        front_Dec = front_Dec.loc[self.date_codes(front_Dec['Date']) >= 0]
 
-        # save the data inside the object
+        # save the data inside the object and in the cache
         self.__data[name] = front_Dec
+        self.__cache.save(name, sources, front_Dec, params)
 
         # reindex the data
         front_Dec = front_Dec.reset_index(drop=True)
@@ -310,6 +392,19 @@ class Preprocessor:
         first_date = first_date if first_date is not None else self.__PHASE_III_START
         last_date = last_date if last_date is not None else self.__PHASE_IV_END
 
+        # the data is filtered on the relevant dates, resolve them first
+        if self.__dates is None and not self.__resolving_dates:
+            self.relevant_dates()
+
+        # look for the data in the cache (only once the relevant dates are known)
+        sources = self.__dates_sources()
+        params = f'{first_date}|{last_date}'
+        if self.__dates is not None:
+            cached = self.__cache.load('Daily_Price', sources, params)
+            if cached is not None:
+                self.__data['Daily_Price'] = cached
+                return cached.reset_index(drop=True)
+
         daily_price = pd.read_csv(os.path.join(self.__data_dir, 'Daily_Future.csv'),
             usecols=['Date', 'CLOSE'], parse_dates=['Date'])
 
@@ -324,10 +419,11 @@ class Preprocessor:
             return daily_price
         
         # filter the data to only keep the dates in the front
-        daily_price = daily_price.loc[daily_price['Date'].isin(self.relevant_dates())]
+        daily_price = daily_price.loc[self.date_codes(daily_price['Date']) >= 0]
 
-        # save the data inside the object
+        # save the data inside the object and in the cache
         self.__data['Daily_Price'] = daily_price
+        self.__cache.save('Daily_Price', sources, daily_price, params)
 
         # reindex the data
         daily_price = daily_price.reset_index(drop=True)
@@ -367,6 +463,9 @@ class Preprocessor:
         # set the date range for the bonds
         Bond.set_date_range(first_date, last_date)
 
+        # read the prices of the issuers once, aligned to the relevant dates
+        Bond.load_prices(bonds['Parent Ticker'].unique(), self.relevant_dates(), self.__cache)
+
         # create the dict of bonds
         bonds_list = {
 
@@ -382,6 +481,11 @@ class Preprocessor:
             for i, row in bonds.iterrows()
         }
 
+        # report the bonds without data in one summary
+        unfound = [key for key, value in bonds_list.items() if value.is_empty()]
+        if unfound:
+            print(f'{len(unfound)} bonds not found in the prices of their issuer: {", ".join(unfound)}')
+
         # use only the bonds that have data
         bonds_list = {
             key: value
@@ -389,11 +493,8 @@ class Preprocessor:
             if not value.is_empty()
         }
 
-        # filter the data to only keep the dates in the front
-        _ = [
-            value.filter_data(self.relevant_dates())
-            for key, value in bonds_list.items()
-        ]
+        # the bonds keep what they need of the issuers' prices
+        Bond.release_cache()
 
         # save the data inside the object
         self.__data['Bonds'] = bonds_list
@@ -418,12 +519,20 @@ class Preprocessor:
         first_date = first_date if first_date is not None else self.__PHASE_III_START
         last_date = last_date if last_date is not None else self.__PHASE_IV_END
 
+        # look for the data in the cache
+        sources = self.__dates_sources('OpenInterest.xlsx')
+        params = f'{first_date}|{last_date}'
+        cached = self.__cache.load('Open_Interest', sources, params)
+        if cached is not None:
+            self.__data['Open_Interest'] = cached
+            return cached.reset_index(drop=True)
+
         # load the data for the open interest from the xlsx file
         open_interest = pd.read_excel(os.path.join(self.__data_dir, 'OpenInterest.xlsx'),
             parse_dates=['Date'])
 
         # filter the data to only keep the dates in the front
-        open_interest = open_interest.loc[open_interest['Date'].isin(self.relevant_dates())]
+        open_interest = open_interest.loc[self.date_codes(open_interest['Date']) >= 0]
 
         # loop over the years
         years = range(first_date.year, last_date.year + 1)
@@ -462,8 +571,9 @@ class Preprocessor:
             # update the previous date
             prev_date = expiry_date
         
-        # save the data inside the object
+        # save the data inside the object and in the cache
         self.__data['Open_Interest'] = df
+        self.__cache.save('Open_Interest', sources, df, params)
 
         # reindex the data
         df = df.reset_index(drop=True)
@@ -480,12 +590,19 @@ class Preprocessor:
         if self.__data.get('Extra_Variables') is not None:
             return self.__data['Extra_Variables']
 
+        # look for the data in the cache
+        sources = self.__dates_sources('Extra_Variables.csv')
+        cached = self.__cache.load('Extra_Variables', sources)
+        if cached is not None:
+            self.__data['Extra_Variables'] = cached
+            return cached.reset_index(drop=True)
+
         # load the data for the extra variables
         extra_variables = pd.read_csv(os.path.join(self.__data_dir, 'Extra_Variables.csv'),
             parse_dates=['Date'], usecols=['Date', 'SPX', 'VIX', 'WTI'])
 
         # filter the data to only keep the dates in the front
-        extra_variables = extra_variables.loc[extra_variables['Date'].isin(self.relevant_dates())]
+        extra_variables = extra_variables.loc[self.date_codes(extra_variables['Date']) >= 0]
 
         # fill the values with the previous value
         extra_variables = extra_variables.ffill()
@@ -494,8 +611,9 @@ class Preprocessor:
         extra_variables['SPX'] = np.log(1 + extra_variables['SPX'].pct_change())
         extra_variables['WTI'] = np.log(1 + extra_variables['WTI'].pct_change())
 
-        # save the data inside the object
+        # save the data inside the object and in the cache
         self.__data['Extra_Variables'] = extra_variables
+        self.__cache.save('Extra_Variables', sources, extra_variables)
 
         # reindex the data
         extra_variables = extra_variables.reset_index(drop=True)
@@ -521,6 +639,14 @@ class Preprocessor:
         first_date = first_date if first_date is not None else self.__PHASE_III_START
         last_date = last_date if last_date is not None else self.__PHASE_IV_END
 
+        # look for the data in the cache
+        sources = self.__sources('OIS_Data.csv')
+        params = f'{first_date}|{last_date}'
+        cached = self.__cache.load('OIS_Data', sources, params)
+        if cached is not None:
+            self.__data['OIS_Data'] = cached
+            return cached.reset_index(drop=True)
+
         # load the data for the OIS rates
         # the dates use short year format
         OIS_rates = pd.read_csv(os.path.join(self.__data_dir, 'OIS_Data.csv'),
@@ -539,8 +665,9 @@ class Preprocessor:
         OIS_rates = OIS_rates.loc[OIS_rates['Date'] >= first_date].loc[
             OIS_rates['Date'] <= last_date]
         
-        # save the data inside the object
+        # save the data inside the object and in the cache
         self.__data['OIS_Data'] = OIS_rates
+        self.__cache.save('OIS_Data', sources, OIS_rates, params)
 
         # reindex the data
         OIS_rates = OIS_rates.reset_index(drop=True)
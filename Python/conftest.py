@@ -0,0 +1,23 @@
+# the tests import the packages of this directory (preprocess, bootstrap, spreads, ...)
+import os
+import pytest
+
+@pytest.fixture(scope='session')
+def preprocessor():
+    """
+    Preprocessor of the project data (the data paths are relative to this directory)
+    """
+
+    from preprocess import Preprocessor
+
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        preprocessor = Preprocessor(lazy=True)
+        # load the datasets while in this directory
+        preprocessor.preprocess_OIS_rates()
+        preprocessor.preprocess_bonds()
+    finally:
+        os.chdir(cwd)
+
+    return preprocessor
@@ -19,8 +19,8 @@ from statsmodels.regression.quantile_regression import QuantReg
 # custom imports
 from preprocess import Preprocessor
 from plots import Plotter
-from bootstrap import Bootstrap
-from spreads import C_spread, Z_spread
+from bootstrap import Bootstrap, CurveStore
+from spreads import C_spread, Z_spread, SpreadCache, RolloverSweep, CalendarOffsetRule
 
 PHASE_III_END = datetime.datetime(2021, 1, 1)
 PHASE_IV_END = datetime.datetime(2022, 10, 28)
@@ -54,7 +54,7 @@ Extra = preprocessor.preprocess_extra_variables()
 Open_Interest = preprocessor.preprocess_open_interest()
 
 # Perform the bootstrap
-bootstrapper = Bootstrap(OIS_rates)
+bootstrapper = Bootstrap(OIS_rates, store=CurveStore())
 
 # boxplot of the volumes for the different months
 plotter.boxplot_months(Volumes_march, Volumes_june, Volumes_september, Front, save=False)
@@ -83,7 +83,7 @@ plotter.plot_C_spread(c_spread, save=False)
 bonds = preprocessor.preprocess_bonds()
 
 # instantiate the Z-spread object
-z_spread = Z_spread(bonds, bootstrapper)
+z_spread = Z_spread(bonds, bootstrapper, cache=SpreadCache())
 
 z_spread.compute()
 
@@ -403,14 +403,27 @@ regression_phase_IV = build_regression_df(C, Z, R, ect, Extra, volatility, PHASE
 model_phase_IV = run_linear_regression(regression_phase_IV, model_IV_regressors,
     'Diff C-spread', 'Phase IV', display=False)
 
+# aggregate the C-spread with the other rollover rules at once
+C_rules = c_spread.aggregate_all(['open interest', 'month', 'week'])
+
+def align_to_dates(C, dates):
+    """
+    Return the C-spread on the given dates, which must all be relevant dates (C has one row per
+    relevant date).
+    """
+
+    codes = preprocessor.date_codes(dates)
+    if (codes < 0).any():
+        raise ValueError('Some dates are not in the relevant dates')
+
+    return C['C-spread'].values[codes]
+
 # Regression with rollover rule of open interest
-c_spread.aggregate('open interest')
-C_open_interest = c_spread.c_spread()
+C_open_interest = C_rules[['Date', 'open interest']].rename(columns={'open interest': 'C-spread'})
 
 # build the dataframe for the ECT
 Y_open_interest = Y.copy()
-Y_open_interest['C-spread'] = C_open_interest[
-    C_open_interest['Date'].isin(Y_open_interest['Date'])]['C-spread'].values
+Y_open_interest['C-spread'] = align_to_dates(C_open_interest, Y_open_interest['Date'])
 
 # perform the johansen test and compute the ECT
 cointegration_coefficients_open_interest = johansen_test(Y_open_interest[
@@ -431,11 +444,10 @@ model_open_interest = run_linear_regression(regression_open_interest, model_VI_r
     'Diff C-spread', 'Open Interest', display=False)
 
 # Regression with rollover rule of one month
-c_spread.aggregate('month')
-C_one_month = c_spread.c_spread()
+C_one_month = C_rules[['Date', 'month']].rename(columns={'month': 'C-spread'})
 
 Y_one_month = Y.copy()
-Y_one_month['C-spread'] = C_one_month[C_one_month['Date'].isin(Y_one_month['Date'])]['C-spread'].values
+Y_one_month['C-spread'] = align_to_dates(C_one_month, Y_one_month['Date'])
 
 cointegration_coefficients_one_month = johansen_test(Y_one_month[
     ['C-spread', 'Z-spread', 'Risk Free Rate']].values, -1, display=False)
@@ -455,8 +467,7 @@ model_one_month = run_linear_regression(regression_one_month, model_VI_regressor
     'Diff C-spread', 'VI One Month', display=False)
 
 # Regression with rollover rule of one week
-c_spread.aggregate('week')
-C_one_week = c_spread.c_spread()
+C_one_week = C_rules[['Date', 'week']].rename(columns={'week': 'C-spread'})
 
 Y_one_week = Y.copy()
 Y_one_week['C-spread'] = C_one_week[C_one_week['Date'] < PHASE_III_END]['C-spread'].values
@@ -491,6 +502,13 @@ summary_table_robustness = pd.DataFrame({
 print('\n --- Summary Table Robustness --- \n')
 print(summary_table_robustness)
 
+# Sweep of the rollover rule: switch from 1 to 30 days before the expiry
+sweep = RolloverSweep(c_spread, Z, R, Extra, volatility, PHASE_III_END)
+sweep_results = sweep.run([CalendarOffsetRule(days=np.arange(1, 31))])
+
+print('\n --- Rollover Sweep --- \n')
+print(sweep_results.pivot(index='Rule', columns='Variable', values='Coefficient').round(2))
+
 # Quantile Regression for model VI
 
 # fit the quantile regression
@@ -549,3 +567,4 @@ summary_table.to_csv('summary_table.csv', index=False)
 summary_table_robustness.to_csv('summary_table_robustness.csv', index=False)
 summary_table_quantile.to_csv('summary_table_quantile.csv', index=False)
 summary_table_quantile_I.to_csv('summary_table_quantile_I.csv', index=False)
+sweep_results.to_csv('sweep_results.csv', index=False)
@@ -1,2 +1,7 @@
 from .c_spread import C_spread
-from .z_spread import Z_spread
\ No newline at end of file
+from .z_spread import Z_spread
+from .spread_cache import SpreadCache
+from .rollover_rules import (RolloverData, RolloverRule, SwitchDateRule, FixedDateRule,
+    CalendarOffsetRule, BusinessDaysRule, CrossoverRule, OpenInterestRule, VolumeRule,
+    register_rule, rule_names, get_rule)
+from .rollover_sweep import RolloverSweep
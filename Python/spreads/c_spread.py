@@ -1,8 +1,9 @@
-import datetime
-from dateutil.relativedelta import relativedelta
 import numpy as np
 import pandas as pd
 
+# custom imports
+from spreads.rollover_rules import RolloverData, get_rule, rule_names
+
 class C_spread:
     """
     C-spread class
@@ -29,6 +30,9 @@ class C_spread:
         self.__C_spread_next = None
         self.__C_spread = None
 
+        # arrays of the rollover engine (built on the first aggregation)
+        self.__engine = None
+
     def c_spread_front(self):
         """
         Return the C-spread for the front futures
@@ -49,15 +53,14 @@ class C_spread:
 
     def compute(self):
 
-        # interpolate the zero rates on the Front dates
-        front_rate = self.__Bootstrapper.interpolate(self.__Front['Date'], self.__Front['Expiry'])
-        next_rate = self.__Bootstrapper.interpolate(self.__Front['Date'], self.__Next['Expiry'])
-
-        # compute the C-spread for the front and next futures
-        C_spread_front = np.log(self.__Front['Price'].values / self.__Daily['Price'].values) / \
-            front_rate['Year Fraction'].values - front_rate['Risk Free Rate'].values
-        C_spread_next = np.log(self.__Next['Price'].values / self.__Daily['Price'].values) / \
-            next_rate['Year Fraction'].values - next_rate['Risk Free Rate'].values
+        # C-spread of the front and next futures, interpolating the zero rates of both at once
+        C_spread, _ = self.__carry(
+            self.__Front['Date'],
+            np.column_stack([self.__Front['Price'].values, self.__Next['Price'].values]),
+            np.column_stack([self.__Front['Expiry'].values, self.__Next['Expiry'].values]),
+            self.__Daily['Price'].values
+        )
+        C_spread_front, C_spread_next = C_spread[:, 0], C_spread[:, 1]
 
         # save the results in a dataframe
         self.__C_spread_front = pd.DataFrame({
@@ -69,85 +72,179 @@ class C_spread:
             'C-spread': C_spread_next
         })
 
-    def aggregate(self, rollover_rule):
+        # the rollover engine has to be rebuilt on the new values
+        self.__engine = None
+
+    def carry_surface(self, strip:pd.DataFrame)->pd.DataFrame:
+        """
+        Compute the C-spread of all the December futures of a strip at once.
+        Input:
+        - strip: DataFrame with the 'Date' and the columns ('Price', k) and ('Expiry', k) of the
+            futures k years after the front one (see Preprocessor.preprocess_strip).
+        Output:
+        - DataFrame with the 'Date' and the columns ('C-spread', k) and ('Year Fraction', k) (NaN
+            where the future is not quoted).
+        """
+
+        dates = strip['Date'].to_numpy(dtype='datetime64[ns]')
+
+        # align the daily price to the dates of the strip
+        daily_dates = self.__Daily['Date'].to_numpy(dtype='datetime64[ns]')
+        order = np.argsort(daily_dates, kind='stable')
+        position = np.minimum(np.searchsorted(daily_dates[order], dates), len(order) - 1)
+        if not np.array_equal(daily_dates[order][position], dates):
+            raise ValueError('The daily price is missing on some dates of the strip')
+
+        C_spread, yf = self.__carry(
+            strip['Date'],
+            strip['Price'].to_numpy(dtype=float),
+            strip['Expiry'].to_numpy(dtype='datetime64[ns]'),
+            self.__Daily['Price'].values[order][position]
+        )
+
+        maturities = strip['Price'].columns
+        surface = pd.concat({
+            'C-spread': pd.DataFrame(C_spread, columns=maturities),
+            'Year Fraction': pd.DataFrame(yf, columns=maturities)
+        }, axis=1)
+        surface.insert(0, 'Date', dates)
+
+        return surface
+
+    def __carry(self, dates, prices, expiries, daily_price):
         """
-        Aggregate the C-spread for the front and next futures given a rollover rule
-        Possible rollover rules are:
+        Return the (dates x maturities) C-spread and year fractions of the futures prices, given
+        their expiries and the daily price, with a single interpolation of the zero rates
+        """
+
+        rates, yf = self.__Bootstrapper.interpolate_surface(dates, expiries)
+
+        C_spread = np.log(prices / daily_price[:, None]) / yf - rates
+
+        return C_spread, yf
+
+    def aggregate(self, rollover_rule, save=False):
+        """
+        Aggregate the C-spread for the front and next futures given a rollover rule, the name of a
+        registered rule (see rollover_rules.rule_names) or a RolloverRule object.
+        The registered rules include:
         - 'constant': switch every year on the 15th of November
         - 'open interest': switch when the open interest of the next future is higher than the front future
         - 'month': switch exactly one month before the expiry of the front future
         - 'week': switch exactly one week before the expiry of the front future
+        - 'volume': switch when the volume of the next future is higher than the front future
+        - 'smoothed open interest': as 'open interest', on the 5-day mean of the open interest
+        - 'business days': switch 5 TARGET business days before the expiry of the front future
+        If save is True, the aggregated C-spread is written to C-spread.csv
+        """
+
+        labels, use_next = self.__use_next([rollover_rule])
+        if len(labels) != 1:
+            raise ValueError('The rollover rule must have a single value of its parameters')
+
+        dates, front, next_ = self.__engine[:3]
+
+        # save the results
+        self.__C_spread = pd.DataFrame({
+            'Date': dates.view('datetime64[ns]'),
+            'C-spread': np.where(use_next[0], next_[0], front[0]),
+            'Expiry': np.where(use_next[0], next_[1], front[1]).view('datetime64[ns]')
+        })
+
+        if save:
+            self.__C_spread.to_csv('C-spread.csv', index=False)
+
+    def aggregate_all(self, rollover_rules=None, save=False):
+        """
+        Aggregate the C-spread for the front and next futures with several rollover rules at once.
+        The aggregated C-spread of the object (see c_spread) is left unchanged.
+        Input:
+        - rollover_rules: list with the rollover rules (see aggregate). Default is all the
+            registered rules.
+        - save: boolean, if True the result is written to C-spread_all.csv. Default is False.
+        Output:
+        - DataFrame with the 'Date' and one column with the C-spread of each rollover rule (named
+            after the rule, or after its parameters for the rules with several values of them).
+        """
+
+        if rollover_rules is None:
+            rollover_rules = rule_names()
+
+        labels, use_next = self.__use_next(rollover_rules)
+        dates, front, next_ = self.__engine[:3]
+
+        C_spread = pd.DataFrame(np.where(use_next, next_[0], front[0]).T, columns=labels)
+        C_spread.insert(0, 'Date', dates.view('datetime64[ns]'))
+
+        if save:
+            C_spread.to_csv('C-spread_all.csv', index=False)
+
+        return C_spread
+
+    def __use_next(self, rollover_rules):
+        """
+        Return the labels and the (labels x dates) mask of the dates using the next future of the
+        rollover rules
         """
 
-        # check that the rollover rule is valid
-        if rollover_rule not in ['constant', 'open interest', 'month', 'week']:
-            raise ValueError('Invalid rollover rule')
+        # check that the rollover rules are valid
+        rules = [get_rule(rollover_rule) for rollover_rule in rollover_rules]
 
         # check that the two c-spread have been computed
         if self.__C_spread_front is None or self.__C_spread_next is None:
             self.compute()
 
+        # align the arrays of the rules (only once)
+        if self.__engine is None:
+            self.__engine = self.__prepare()
+        data = self.__engine[3]
+
+        labels = []
+        for rollover_rule, rule in zip(rollover_rules, rules):
+            rule_labels = rule.labels()
+            # the registered rules with a single row are named after their name
+            if isinstance(rollover_rule, str) and len(rule_labels) == 1:
+                rule_labels = [rollover_rule]
+            labels.extend(rule_labels)
+
+        use_next = np.concatenate([rule.use_next(data) for rule in rules])
+
+        return labels, use_next
+
+    def __prepare(self):
+        """
+        Arrays shared by all the rollover rules: the dates, the (C-spread, expiry) of the front and
+        next futures and the RolloverData of the rules
+        """
+
         # add the expiry column to the c-spread dataframes
         self.__C_spread_front['Expiry'] = self.__Front['Expiry'].values
         self.__C_spread_next['Expiry'] = self.__Next['Expiry'].values
 
-        # initialize the aggregated C-spread
-        C_spread = pd.DataFrame()
-
-        # get the expiry dates
-        expiry_dates = self.__C_spread_front['Expiry'].unique()
-
-        # iterate over the expiry dates
-        for expiry in expiry_dates:
-            # get the data for the current expiry
-            Front = self.__C_spread_front[self.__C_spread_front['Expiry'] == expiry]
-            Next = self.__C_spread_next[self.__C_spread_next['Date'].isin(Front['Date'].values)]
-
-            # switch the front and next futures according to the rollover rule
-            if rollover_rule == 'constant':
-                # get the front up to the 15th of November
-                C_spread = pd.concat([
-                    C_spread,
-                    Front[Front['Date'] < datetime.datetime(expiry.year, 11, 15)],
-                    Next[Next['Date'] >= datetime.datetime(expiry.year, 11, 15)]
-                ])
-            elif rollover_rule == 'open interest':
-                # get the open interest for the period
-                Open_Interest = self.__Open_Interest[
-                    self.__Open_Interest['Date'].isin(Front['Date'].values)
-                ]
-                df = Open_Interest[Open_Interest['Next'] > Open_Interest['Front']]
-
-                # get the switch date
-                if df.empty: # no date is found, just use the Front
-                    C_spread = pd.concat([C_spread, Front])
-                else:
-                    switch_date = df['Date'].values[0]
-                    C_spread = pd.concat([
-                        C_spread,
-                        Front[Front['Date'] < switch_date],
-                        Next[Next['Date'] >= switch_date]
-                    ])
-            elif rollover_rule == 'month':
-                # get the front up to one month before the expiry
-                C_spread = pd.concat([
-                    C_spread,
-                    Front[Front['Date'] < expiry - relativedelta(months=1)],
-                    Next[Next['Date'] >= expiry - relativedelta(months=1)]
-                ])
-            elif rollover_rule == 'week':
-                # get the front up to one week before the expiry
-                C_spread = pd.concat([
-                    C_spread,
-                    Front[Front['Date'] < expiry - np.timedelta64(7, 'D')],
-                    Next[Next['Date'] >= expiry - np.timedelta64(7, 'D')]
-                ])
-        
-        # save the results
-        self.__C_spread = C_spread
+        dates = self.__C_spread_front['Date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        front_expiry = self.__C_spread_front['Expiry'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        next_expiry = self.__C_spread_next['Expiry'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        front = (self.__C_spread_front['C-spread'].to_numpy(), front_expiry)
+        next_ = (self.__C_spread_next['C-spread'].to_numpy(), next_expiry)
+
+        # align the open interest to the dates
+        Open_Interest = self.__Open_Interest.sort_values('Date', kind='stable')
+        oi_dates = Open_Interest['Date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        position = np.minimum(np.searchsorted(oi_dates, dates), len(oi_dates) - 1)
+        found = oi_dates[position] == dates
+
+        data = RolloverData(
+            dates,
+            front_expiry,
+            self.__Front['Volume'].to_numpy(),
+            self.__Next['Volume'].to_numpy(),
+            np.where(found, Open_Interest['Front'].to_numpy(dtype=np.float64)[position], np.nan),
+            np.where(found, Open_Interest['Next'].to_numpy(dtype=np.float64)[position], np.nan)
+        )
+
+        return dates, front, next_, data
 
-        self.__C_spread.to_csv('C-spread.csv', index=False)
-    
     def save_aggregated(self, method='constant'):
         """
         Save the aggregated C-spread
@@ -0,0 +1,265 @@
+import abc
+import numpy as np
+
+# custom imports
+from bootstrap import eur_calendar
+
+class RolloverData:
+    """
+    Arrays the rollover rules are evaluated on, aligned by date.
+    The dates are grouped by the expiry of the front future, in each group the C-spread switches
+    once from the front to the next future.
+    """
+
+    def __init__(self, dates:np.ndarray, expiry:np.ndarray, front_volume:np.ndarray,
+        next_volume:np.ndarray, front_open_interest:np.ndarray, next_open_interest:np.ndarray):
+        """
+        Constructor for the RolloverData class
+        :param dates: sorted int64 array with the dates (nanoseconds since epoch)
+        :param expiry: int64 array with the expiry of the front future on each date
+        :param front_volume: array with the volume of the front future on each date
+        :param next_volume: array with the volume of the next future on each date
+        :param front_open_interest: array with the open interest of the front future (NaN where missing)
+        :param next_open_interest: array with the open interest of the next future (NaN where missing)
+        """
+
+        self.dates = dates
+        self.front_volume = np.asarray(front_volume, dtype=np.float64)
+        self.next_volume = np.asarray(next_volume, dtype=np.float64)
+        self.front_open_interest = np.asarray(front_open_interest, dtype=np.float64)
+        self.next_open_interest = np.asarray(next_open_interest, dtype=np.float64)
+
+        # one group per expiry of the front future
+        self.expiries, self.group = np.unique(expiry, return_inverse=True)
+
+        # first date of each group
+        self.group_start = np.full(len(self.expiries), len(dates))
+        np.minimum.at(self.group_start, self.group, np.arange(len(dates)))
+
+    def trailing_mean(self, values:np.ndarray, windows:np.ndarray)->np.ndarray:
+        """
+        Mean of the values over the last window dates of the same group (NaN values are skipped)
+        for each window, as a (windows x dates) array
+        """
+
+        valid = ~np.isnan(values)
+        sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+        counts = np.concatenate([[0], np.cumsum(valid)])
+
+        # the windows do not cross the start of the group
+        end = np.arange(1, len(values) + 1)
+        start = np.maximum(end - np.asarray(windows)[:, None], self.group_start[self.group])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (sums[end] - sums[start]) / (counts[end] - counts[start])
+
+class RolloverRule(abc.ABC):
+    """
+    Base class of the rollover rules.
+    A rule returns the mask of the dates where the C-spread of the next future is used, one row
+    for each value of its parameters: the parameters can be arrays, so that a sweep over them is
+    evaluated in one batch.
+    """
+
+    @abc.abstractmethod
+    def labels(self)->list[str]:
+        """
+        Return the label of each row of the mask
+        """
+
+    @abc.abstractmethod
+    def use_next(self, data:RolloverData)->np.ndarray:
+        """
+        Return the (labels x dates) boolean mask of the dates using the next future
+        """
+
+class SwitchDateRule(RolloverRule):
+    """
+    Rollover rule switching to the next future from a date computed from the expiry
+    """
+
+    @abc.abstractmethod
+    def switch_dates(self, data:RolloverData)->np.ndarray:
+        """
+        Return the (labels x expiries) int64 array with the switch dates of each expiry
+        """
+
+    def use_next(self, data:RolloverData)->np.ndarray:
+        return data.dates >= self.switch_dates(data)[:, data.group]
+
+class FixedDateRule(SwitchDateRule):
+    """
+    Switch every year on the same day (the 15th of November by default)
+    """
+
+    def __init__(self, month:int = 11, day:int = 15):
+        self.__months = np.atleast_1d(month)
+        self.__days = np.atleast_1d(day)
+
+    def labels(self)->list[str]:
+        return [f'fixed date {month}/{day}'
+            for month, day in np.broadcast(self.__months, self.__days)]
+
+    def switch_dates(self, data:RolloverData)->np.ndarray:
+
+        months, days = np.broadcast_arrays(self.__months, self.__days)
+        years = data.expiries.astype('datetime64[ns]').astype('datetime64[Y]')
+
+        switch = years[None, :].astype('datetime64[M]') + (months[:, None] - 1).astype('timedelta64[M]')
+        switch = switch.astype('datetime64[D]') + (days[:, None] - 1).astype('timedelta64[D]')
+
+        return switch.astype('datetime64[ns]').view(np.int64)
+
+class CalendarOffsetRule(SwitchDateRule):
+    """
+    Switch a number of months and days before the expiry (like expiry - relativedelta, the day is
+    moved to the end of the month if the month is shorter)
+    """
+
+    def __init__(self, months:int = 0, days:int = 0):
+        self.__months = np.atleast_1d(months)
+        self.__days = np.atleast_1d(days)
+
+    def labels(self)->list[str]:
+        return [f'{months} months {days} days before expiry'
+            for months, days in np.broadcast(self.__months, self.__days)]
+
+    def switch_dates(self, data:RolloverData)->np.ndarray:
+
+        months, days = np.broadcast_arrays(self.__months, self.__days)
+        expiries = data.expiries.astype('datetime64[ns]')
+
+        # move back the month, clipping the day to the length of the new month
+        month = expiries.astype('datetime64[M]')
+        day = expiries.astype('datetime64[D]') - month.astype('datetime64[D]')
+        target = month[None, :] - months[:, None].astype('timedelta64[M]')
+        length = (target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')
+        switch = target.astype('datetime64[D]') + np.minimum(day, length - np.timedelta64(1, 'D'))
+
+        # keep the time of the day and move back the days
+        switch = switch.astype('datetime64[ns]') + (expiries - expiries.astype('datetime64[D]'))
+        switch = switch - days[:, None].astype('timedelta64[D]')
+
+        return switch.view(np.int64)
+
+class BusinessDaysRule(SwitchDateRule):
+    """
+    Switch a number of business days before the expiry
+    """
+
+    def __init__(self, days:int = 5, holidays:np.ndarray = None):
+        """
+        :param days: number of business days before the expiry (an array for a sweep)
+        :param holidays: non-trading days (e.g. eur_calendar()). Default is only weekends.
+        """
+        self.__days = np.atleast_1d(days)
+        self.__holidays = np.asarray(holidays if holidays is not None else [], dtype='datetime64[D]')
+
+    def labels(self)->list[str]:
+        return [f'{days} business days before expiry' for days in self.__days]
+
+    def switch_dates(self, data:RolloverData)->np.ndarray:
+
+        expiries = data.expiries.astype('datetime64[ns]').astype('datetime64[D]')
+        switch = np.busday_offset(expiries[None, :], -self.__days[:, None], roll='backward',
+            holidays=self.__holidays)
+
+        return switch.astype('datetime64[ns]').view(np.int64)
+
+class CrossoverRule(SwitchDateRule):
+    """
+    Switch on the first date of each expiry when a variable of the next future is higher than
+    the one of the front future, both averaged over the last window dates (1 for no smoothing)
+    """
+
+    # name of the variable
+    VARIABLE = None
+
+    def __init__(self, window:int = 1):
+        self.__windows = np.atleast_1d(window)
+
+    @abc.abstractmethod
+    def variable(self, data:RolloverData)->tuple[np.ndarray, np.ndarray]:
+        """
+        Return the variable of the front and next futures
+        """
+
+    def labels(self)->list[str]:
+        return [f'{self.VARIABLE} crossover over {window} dates' for window in self.__windows]
+
+    def switch_dates(self, data:RolloverData)->np.ndarray:
+
+        front, next_ = self.variable(data)
+        if np.all(self.__windows == 1):
+            crossing = (next_ > front)[None, :]
+        else:
+            crossing = data.trailing_mean(next_, self.__windows) > \
+                data.trailing_mean(front, self.__windows)
+        crossing = np.broadcast_to(crossing, (len(self.__windows), len(data.dates)))
+
+        # first crossing of each expiry (no crossing: stay on the front)
+        rows, columns = np.nonzero(crossing)
+        first = np.full((len(self.__windows), len(data.expiries)), len(data.dates))
+        np.minimum.at(first, (rows, data.group[columns]), columns)
+
+        return np.append(data.dates, np.iinfo(np.int64).max)[first]
+
+class OpenInterestRule(CrossoverRule):
+    """
+    Switch when the open interest of the next future is higher than the one of the front future
+    """
+
+    VARIABLE = 'open interest'
+
+    def variable(self, data:RolloverData)->tuple[np.ndarray, np.ndarray]:
+        return data.front_open_interest, data.next_open_interest
+
+class VolumeRule(CrossoverRule):
+    """
+    Switch when the volume of the next future is higher than the one of the front future
+    """
+
+    VARIABLE = 'volume'
+
+    def variable(self, data:RolloverData)->tuple[np.ndarray, np.ndarray]:
+        return data.front_volume, data.next_volume
+
+# registry of the rollover rules by name
+__RULES = {
+    'constant': FixedDateRule(11, 15),
+    'open interest': OpenInterestRule(),
+    'month': CalendarOffsetRule(months=1),
+    'week': CalendarOffsetRule(days=7),
+    'volume': VolumeRule(),
+    'smoothed open interest': OpenInterestRule(window=5),
+    'business days': BusinessDaysRule(5, holidays=eur_calendar())
+}
+
+def register_rule(name:str, rule:RolloverRule)->None:
+    """
+    Register a rollover rule under the name (replacing the rule with the same name)
+    """
+
+    if not isinstance(rule, RolloverRule):
+        raise TypeError('The rule must be a RolloverRule')
+
+    __RULES[name] = rule
+
+def rule_names()->list[str]:
+    """
+    Return the names of the registered rollover rules
+    """
+    return list(__RULES)
+
+def get_rule(rule:str | RolloverRule)->RolloverRule:
+    """
+    Return the rollover rule registered under the name (rule objects are returned as they are)
+    """
+
+    if isinstance(rule, RolloverRule):
+        return rule
+
+    if rule not in __RULES:
+        raise ValueError('Invalid rollover rule')
+
+    return __RULES[rule]
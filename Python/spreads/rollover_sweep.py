@@ -0,0 +1,165 @@
+import datetime
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.vector_ar.vecm import coint_johansen
+from statsmodels.regression.linear_model import OLS
+
+# regressors of model VI
+MODEL_VI_REGRESSORS = ['Diff C-spread Lag 1', 'Diff C-spread Lag 2', 'Diff C-spread Lag 3',
+    'Diff Z-spread', 'Diff Risk Free Rate', 'ECT Lag 1', 'WTI', 'SPX', 'VIX',
+    'Volatility', '(Intercept)']
+
+# regressors shared by all the rollover rules (set once per worker process)
+_shared = None
+
+def _init_worker(shared:dict)->None:
+    """
+    Keep the regressors shared by all the rollover rules in the worker process
+    """
+
+    global _shared
+
+    _shared = shared
+
+def _fit_chunk(labels:list[str], C_spreads:np.ndarray)->list[tuple]:
+    """
+    Fit model VI on a chunk of C-spreads (one column per rollover rule) in the worker process
+    """
+    return [
+        row
+        for label, C in zip(labels, C_spreads.T)
+        for row in _fit_model_VI(_shared, label, C)
+    ]
+
+def _lag(values:np.ndarray, lag:int)->np.ndarray:
+    """
+    Shift the values by lag dates (NaN at the start)
+    """
+    return np.concatenate([np.full(lag, np.nan), values[:len(values) - lag]])
+
+def _fit_model_VI(shared:dict, label:str, C:np.ndarray)->list[tuple]:
+    """
+    Johansen test, ECT and model VI regression for the C-spread of a rollover rule, as in
+    runProject.py. Returns one (rule, variable, coefficient, p-value) row per regressor.
+    """
+
+    # cointegration coefficients of the C-spread, Z-spread and risk free rate
+    Y = np.column_stack([C, shared['Z-spread'], shared['Risk Free Rate']])
+    result = coint_johansen(Y, -1, 1)
+    ect = Y @ (result.evec[:, 0] / result.evec[0, 0])
+
+    diff_C = np.concatenate([[np.nan], np.diff(C)])
+
+    regression = pd.DataFrame({
+        'Diff C-spread': diff_C,
+        'Diff C-spread Lag 1': _lag(diff_C, 1),
+        'Diff C-spread Lag 2': _lag(diff_C, 2),
+        'Diff C-spread Lag 3': _lag(diff_C, 3),
+        'Diff Z-spread': shared['Diff Z-spread'],
+        'Diff Risk Free Rate': shared['Diff Risk Free Rate'],
+        'ECT Lag 1': _lag(ect, 1),
+        'WTI': shared['WTI'],
+        'SPX': shared['SPX'],
+        'VIX': shared['VIX'],
+        'Volatility': shared['Volatility'],
+        '(Intercept)': 1
+    }).dropna()
+
+    model = OLS(regression['Diff C-spread'], regression[MODEL_VI_REGRESSORS]).fit()
+
+    return [
+        (label, regressor, model.params[regressor], model.pvalues[regressor])
+        for regressor in MODEL_VI_REGRESSORS
+    ]
+
+class RolloverSweep:
+    """
+    Sweep of the rollover rules of the C-spread.
+    All the rules are aggregated at once from the C-spread of the front and next futures (the
+    risk free rates are interpolated only once, by C_spread.compute), then the Johansen test and
+    model VI are fitted on the C-spread of each rule in a pool of worker processes.
+    """
+
+    def __init__(self, c_spread, Z:pd.DataFrame, R:pd.DataFrame, Extra:pd.DataFrame,
+        volatility:pd.DataFrame, end_date:datetime.datetime):
+        """
+        Constructor for the RolloverSweep class
+        :param c_spread: C_spread object (computed or not)
+        :param Z: DataFrame with the 'Date' and 'Z-spread'
+        :param R: DataFrame with the 'Date' and 'Risk Free Rate'
+        :param Extra: DataFrame with the 'Date', 'WTI', 'SPX' and 'VIX'
+        :param volatility: DataFrame with the 'Date' and 'Volatility'
+        :param end_date: datetime object with the end of the sample (excluded)
+        """
+
+        self.__c_spread = c_spread
+        self.__end_date = end_date
+
+        # the regressors that do not depend on the rollover rule, aligned by position
+        Z = Z[Z['Date'] < end_date]['Z-spread'].values
+        R = R[R['Date'] < end_date]['Risk Free Rate'].values
+        self.__shared = {
+            'Z-spread': Z,
+            'Risk Free Rate': R,
+            'Diff Z-spread': np.concatenate([[np.nan], np.diff(Z)]),
+            'Diff Risk Free Rate': np.concatenate([[np.nan], np.diff(R)]),
+            'WTI': Extra[Extra['Date'] < end_date]['WTI'].values,
+            'SPX': Extra[Extra['Date'] < end_date]['SPX'].values,
+            'VIX': Extra[Extra['Date'] < end_date]['VIX'].values,
+            'Volatility': volatility[volatility['Date'] < end_date]['Volatility'].values
+        }
+
+        self.__C_spreads = None
+
+    def c_spreads(self)->pd.DataFrame:
+        """
+        Return the C-spread of each rollover rule of the last sweep
+        """
+        return self.__C_spreads.copy()
+
+    def run(self, rollover_rules:list, workers:int = None)->pd.DataFrame:
+        """
+        Run the sweep over the rollover rules.
+        Input:
+        - rollover_rules: list with the rollover rules (names or RolloverRule objects, possibly
+            with arrays of parameters, see C_spread.aggregate_all).
+        - workers: number of worker processes. Default is None (no pool).
+        Output:
+        - DataFrame with the columns 'Rule', 'Variable', 'Coefficient' and 'P-value', one row per
+            rule and regressor of model VI. 'Rule' is categorical, ordered as the rules.
+        """
+
+        # aggregate all the rules at once
+        self.__C_spreads = self.__c_spread.aggregate_all(rollover_rules)
+
+        sample = self.__C_spreads[self.__C_spreads['Date'] < self.__end_date]
+        labels = list(sample.columns.drop('Date'))
+        C_spreads = sample[labels].to_numpy()
+
+        if workers is None or workers <= 1:
+            rows = [
+                row
+                for label, C in zip(labels, C_spreads.T)
+                for row in _fit_model_VI(self.__shared, label, C)
+            ]
+        else:
+            # split the rules in chunks, the shared regressors are sent once to each worker
+            chunks = np.array_split(np.arange(len(labels)), min(len(labels), 4 * workers))
+            chunks = [chunk for chunk in chunks if len(chunk)]
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                initializer=_init_worker, initargs=(self.__shared,)) as executor:
+                # map returns the chunks in order, so the table does not depend on the scheduling
+                results = executor.map(_fit_chunk,
+                    [[labels[i] for i in chunk] for chunk in chunks],
+                    [C_spreads[:, chunk] for chunk in chunks])
+                rows = [row for result in results for row in result]
+
+        results = pd.DataFrame(rows, columns=['Rule', 'Variable', 'Coefficient', 'P-value'])
+
+        # keep the order of the rules when the table is sorted or pivoted (the labels would
+        # sort as strings, e.g. '10 months' before '2 months')
+        results['Rule'] = pd.Categorical(results['Rule'], categories=labels, ordered=True)
+
+        return results
@@ -0,0 +1,107 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+class SpreadCache:
+    """
+    On-disk cache of the Z-spread series of the bonds.
+    Each entry is keyed by a hash of the terms and prices of the bond and of the curve, and saved
+    as an uncompressed .npz file with one array per column. When the cache grows past its size
+    limit the least recently used entries are removed.
+    """
+
+    # columns of the cached series
+    COLUMNS = ['Date', 'Z-spread']
+
+    def __init__(self, directory:str = None, max_size:int = 64 * 1024 ** 2):
+        """
+        Constructor for the SpreadCache class
+        :param directory: directory of the cache. Default is spreads/Cache/
+        :param max_size: maximum size of the cache in bytes. Default is 64 MB
+        """
+
+        if directory is None:
+            directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Cache')
+
+        self.__directory = directory
+        self.__max_size = max_size
+
+        # if the directory does not exist, create it
+        if not os.path.exists(self.__directory):
+            os.makedirs(self.__directory)
+
+    @staticmethod
+    def key(bond, curve_fingerprint:str)->str:
+        """
+        Key of the Z-spread series of a bond computed on a curve
+        """
+
+        h = hashlib.sha256()
+        h.update(bond.fingerprint().encode())
+        h.update(curve_fingerprint.encode())
+
+        return h.hexdigest()
+
+    def __path(self, key:str)->str:
+        """
+        Path of the entry with the given key
+        """
+        return os.path.join(self.__directory, f'{key}.npz')
+
+    def load(self, key:str)->pd.DataFrame | None:
+        """
+        Return the series saved under the given key, None if it is not in the cache
+        """
+
+        path = self.__path(key)
+
+        try:
+            with np.load(path) as entry:
+                series = pd.DataFrame({column: entry[column] for column in self.COLUMNS})
+        except (OSError, KeyError, ValueError):
+            # missing or unreadable entry
+            return None
+
+        # mark the entry as recently used
+        os.utime(path)
+
+        return series
+
+    def save(self, key:str, series:pd.DataFrame)->None:
+        """
+        Save the series under the given key and evict the least recently used entries
+        """
+
+        path = self.__path(key)
+
+        # write to a temporary file and rename it, so readers never see partial entries
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **{column: series[column].to_numpy() for column in self.COLUMNS})
+        os.replace(tmp_path, path)
+
+        self.__evict()
+
+    def __evict(self)->None:
+        """
+        Remove the least recently used entries until the cache fits in its maximum size
+        """
+
+        entries = []
+        for name in os.listdir(self.__directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.__directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        size = sum(entry[1] for entry in entries)
+
+        # oldest first
+        for _, entry_size, name in sorted(entries):
+            if size <= self.__max_size:
+                break
+            try:
+                os.remove(os.path.join(self.__directory, name))
+            except OSError:
+                continue
+            size -= entry_size
@@ -1,27 +1,56 @@
 import os
-import pickle
+import shutil
+import tempfile
 import datetime
+import concurrent.futures
 import pandas as pd
 import numpy as np
 
+# custom imports
+from preprocess import Bond
+from bootstrap import CurveLookup
+
+# curve of the worker processes (mapped from disk once per worker)
+_curve = None
+
+def _init_worker(directory:str)->None:
+    """
+    Map the curve saved in the directory into the worker process
+    """
+
+    global _curve
+
+    _curve = CurveLookup(
+        np.load(os.path.join(directory, 'dates.npy'), mmap_mode='r'),
+        np.load(os.path.join(directory, 'year_fractions.npy'), mmap_mode='r'),
+        np.load(os.path.join(directory, 'zero_rates.npy'), mmap_mode='r')
+    )
+
+def _solve_chunk(*panel)->np.ndarray:
+    """
+    Solve a chunk of the panel with the curve of the worker process
+    """
+    return Bond.solve_panel(_curve, *panel)
+
 class Z_spread:
     """
     Z-spread class
     """
 
-    def __init__(self, bonds, Bootstrapper):
+    def __init__(self, bonds, Bootstrapper, cache = None):
+        """
+        Constructor for the Z_spread class
+        :param bonds: dictionary of the bonds
+        :param Bootstrapper: Bootstrap object with the OIS curve
+        :param cache: SpreadCache where the Z-spreads of the bonds are kept between runs. Default
+            is None (no cache)
+        """
 
         # save the bonds
         self.__bonds = bonds
 
-        # parent directory
-        self.__parent_directory = os.path.dirname(os.path.abspath(__file__))
-
-        # if there is a data file, load it into the bonds
-        if os.path.exists(os.path.join(self.__parent_directory, 'data.pkl')):
-            with open(os.path.join(self.__parent_directory, 'data.pkl'), 'rb') as f:
-                print('Loading data')
-                self.__bonds = pickle.load(f)
+        # save the cache
+        self.__cache = cache
 
         # aggregate the bonds by issuer
         self.__aggregate_bonds_by_issuer()
@@ -43,23 +72,6 @@ class Z_spread:
 
         return self.__z_spread.copy()
     
-    def __save(self)->None:
-        """
-        Save the data for the bonds in a pickle file
-        """
-
-        file_name = os.path.join(self.__parent_directory, 'data.pkl')
-
-        # is the save file does not exist
-        if not os.path.exists(file_name):
-            # create the save file
-            with open(file_name, 'wb') as f:
-                pass
-        
-        # save the bonds list to the file
-        with open(file_name, 'wb') as f:
-            pickle.dump(self.__bonds, f)
-
     def __aggregate_bonds_by_issuer(self)->None:
         """
         Aggregate the bonds by issuer
@@ -78,62 +90,168 @@ class Z_spread:
 
             self.__bonds_by_issuer[issuer].append(self.__bonds[bond])
     
-    def __compute_by_issuer(self)->None:
+    def __compute_by_issuer(self, workers:int = None)->None:
         """
         Compute the Z-spread by issuer
+        The bonds that are not in the cache are stacked in one flat panel of cash flows and solved
+        at once, then the Z-spread of each issuer is the volume weighted average of its bonds.
+        :param workers: number of worker processes. Default is None (solve in this process)
         """
 
-        z_spreads_by_issuer = {}
+        issuers = list(self.__bonds_by_issuer)
+
+        # exclude the problematic bonds
+        bonds = [
+            bond
+            for issuer in issuers
+            for bond in self.__bonds_by_issuer[issuer]
+            if bond.code() != "XS0877820422"
+        ]
+
+        # common dates of the bonds
+        dates = np.unique(np.concatenate([bond.dates().to_numpy() for bond in bonds]))
+
+        curve = self.__Bootstrapper.lookup()
+
+        # look for the Z-spreads of the bonds in the cache
+        series = [None] * len(bonds)
+        if self.__cache is not None:
+            curve_fingerprint = curve.fingerprint()
+            keys = [self.__cache.key(bond, curve_fingerprint) for bond in bonds]
+            series = [self.__cache.load(key) for key in keys]
+
+        # solve the bonds that are not cached
+        missing = [i for i, cached in enumerate(series) if cached is None]
+        if missing:
+            z_spreads = self.__solve(curve, dates, [bonds[i] for i in missing], workers)
+
+            for i, z_spread in zip(missing, z_spreads):
+                series[i] = z_spread
+                if self.__cache is not None:
+                    self.__cache.save(keys[i], z_spread)
+
+        # bond-days of all the bonds
+        z = np.concatenate([z_spread['Z-spread'].to_numpy() for z_spread in series])
+        date_index = np.concatenate([
+            np.searchsorted(dates, z_spread['Date'].to_numpy(dtype='datetime64[ns]'))
+            for z_spread in series
+        ])
+        lengths = [len(z_spread) for z_spread in series]
+        issuer_index = np.repeat([issuers.index(bond.issuer()) for bond in bonds], lengths)
+        volumes = np.repeat(np.array([bond.volume() for bond in bonds], dtype=float), lengths)
+
+        # volume weighted average by issuer and date (grouped sums)
+        group = issuer_index * len(dates) + date_index
+        volume_traded = volumes * (z != 0)
+        z_spread = np.bincount(group, z * volume_traded, minlength=len(issuers) * len(dates))
+        volume_traded = np.bincount(group, volume_traded, minlength=len(issuers) * len(dates))
+
+        # normalize the Z-spread by the Volume traded (in case the Volume is 0, set the Z-spread to 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z_spread = np.nan_to_num(z_spread / volume_traded).reshape(len(issuers), len(dates))
+
+        z_spreads_by_issuer = {issuer: z_spread[i] for i, issuer in enumerate(issuers)}
 
-        # cycle over the issuers
-        for issuer in self.__bonds_by_issuer:
+        # add the date
+        z_spreads_by_issuer['Date'] = dates
 
-            # initialize the z_spread of the issuer
-            z_spread = pd.DataFrame(columns=['Z-spread', 'Volume Traded'])
-            z_spread['Z-spread'] = np.zeros(len(self.__bonds_by_issuer[issuer][0].dates()))
-            z_spread['Volume Traded'] = np.zeros(len(self.__bonds_by_issuer[issuer][0].dates()))
+        self.__z_spreads_by_issuer = pd.DataFrame(data=z_spreads_by_issuer)
 
-            print(f'Computing Z-spread for issuer {issuer}')
-            print(z_spread.shape)
+    def __solve(self, curve:CurveLookup, dates:np.ndarray, bonds:list, workers:int = None
+        )->list[pd.DataFrame]:
+        """
+        Solve the Z-spreads of the bonds at all their dates (0 where they are not quoted)
+        """
+
+        # stack the cash flows of all the bonds
+        panels = [bond.cash_flows() for bond in bonds]
+        positions, prices, counts, cash_flows, x = [
+            np.concatenate([panel[i] for panel in panels]) for i in range(5)
+        ]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        # bond and date of each price
+        bond_index = np.concatenate([np.full(len(panel[1]), i) for i, panel in enumerate(panels)])
+        date_index = np.concatenate([
+            np.searchsorted(dates, bond.dates().to_numpy()[panel[0]])
+            for bond, panel in zip(bonds, panels)
+        ])
+
+        rows = curve.rows(dates)[date_index]
+        # dates before the curve have no row (-1), they must not be priced on another curve
+        if (rows < 0).any():
+            before = np.flatnonzero(rows < 0)[0]
+            raise KeyError(f'The date {dates[date_index[before]]} of the bond '
+                f'{bonds[bond_index[before]].code()} is before the start of the curve')
+
+        panel = (rows, counts, cash_flows, x, prices, bond_index, date_index)
+
+        if workers is None or workers <= 1:
+            z = Bond.solve_panel(curve, *panel)
+        else:
+            z = self.__solve_in_pool(curve, panel, offsets, len(bonds), workers)
+
+        # split the panel back into the bonds
+        z_spreads = []
+        for i, bond in enumerate(bonds):
+            z_spread = pd.DataFrame()
+            z_spread['Date'] = bond.dates()
+            z_spread['Z-spread'] = 0.0
+            z_spread.loc[positions[bond_index == i], 'Z-spread'] = z[bond_index == i]
+            z_spreads.append(z_spread)
+
+        return z_spreads
+
+    def __solve_in_pool(self, curve:CurveLookup, panel:tuple, offsets:np.ndarray, n_bonds:int,
+        workers:int)->np.ndarray:
+        """
+        Solve the panel in a pool of worker processes, split in chunks of whole bonds.
+        The curve is saved once to a temporary directory and mapped by each worker, so only the
+        chunks of the panel are sent to the tasks.
+        """
 
-            # get the list of bonds for the issuer
-            bonds = self.__bonds_by_issuer[issuer]
+        rows, counts, cash_flows, x, prices, bond_index, date_index = panel
 
-            for bond in bonds:
+        # split the bonds in chunks and find where each chunk starts in the panel
+        bond_chunks = np.array_split(np.arange(n_bonds), min(n_bonds, 4 * workers))
+        starts = np.searchsorted(bond_index, [chunk[0] for chunk in bond_chunks if len(chunk)])
+        bounds = np.append(np.unique(starts), len(prices))
 
-                t0 = datetime.datetime.now()
-                z_spread_bond = bond.z_spread(self.__Bootstrapper)
-                t1 = datetime.datetime.now()
-                print(f'{bond.code()}: {(t1 - t0).total_seconds()} seconds')
+        chunks = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            chunks.append((
+                rows[start:end], counts[start:end], cash_flows[offsets[start]:offsets[end]],
+                x[offsets[start]:offsets[end]], prices[start:end], bond_index[start:end],
+                date_index[start:end]
+            ))
 
-                # exclude the problematic bonds
-                if bond.code() ==  "XS0877820422":
-                    continue
+        # save the curve for the workers
+        directory = tempfile.mkdtemp(prefix='curve_')
 
-                # multiply by the Volume
-                z_spread['Z-spread'] += z_spread_bond['Z-spread'].values * z_spread_bond['Volume'].values
-                z_spread['Volume Traded'] += z_spread_bond['Volume'].values
-            
-            # normalize the Z-spread by the Volume traded (in case the Volume is 0, set the Z-spread to 0)
-            z_spread['Z-spread'] /= z_spread['Volume Traded']
-            z_spread['Z-spread'] = z_spread['Z-spread'].fillna(0)
+        try:
+            np.save(os.path.join(directory, 'dates.npy'), curve.dates())
+            np.save(os.path.join(directory, 'year_fractions.npy'), curve.year_fractions())
+            np.save(os.path.join(directory, 'zero_rates.npy'), curve.zero_rates())
 
-            z_spreads_by_issuer[issuer] = z_spread['Z-spread'].values
-        
-        # add the date
-        z_spreads_by_issuer['Date'] = self.__bonds_by_issuer[issuer][0].dates().values
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                initializer=_init_worker, initargs=(directory,)) as executor:
+                # map returns the chunks in order, so the merge does not depend on the scheduling
+                z = np.concatenate(list(executor.map(_solve_chunk, *zip(*chunks))))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
 
-        self.__z_spreads_by_issuer = pd.DataFrame(data=z_spreads_by_issuer)
+        return z
 
-    def compute(self):
+    def compute(self, workers:int = None):
         """
         Compute the Z-spread for the bonds.
+        :param workers: number of worker processes solving the Z-spreads. Default is None (no pool)
         """
 
         t0 = datetime.datetime.now()
 
         # compute the Z-spread by issuer
-        self.__compute_by_issuer()
+        self.__compute_by_issuer(workers)
 
         # sum the Z-spreads and normalize by the number of issuers trading that day
         self.__z_spread = pd.DataFrame(columns=['Date', 'Z-spread'])
@@ -149,6 +267,3 @@ class Z_spread:
         # print the time taken to compute the Z-spread in seconds
         print(f'Time taken to compute the Z-spread: {t1 - t0} seconds')
 
-        # if there is no data file, save the data
-        if not os.path.exists(os.path.join(self.__parent_directory, 'data.pkl')):
-            self.__save()
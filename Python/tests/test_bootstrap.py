@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bootstrap import Bootstrap
+from yearfracion import yearfrac
+
+# discount factors of the original per-tenor bootstrap (date -> pillar -> discount factor)
+DISCOUNT_FACTORS = {
+    '2013-01-02': {'EUREON1Y': 0.9995502024089159, 'EUREON2Y': 0.9981221879530598,
+        'EUREON5Y': 0.975179079872496, 'EUREON10Y': 0.8734487360983618},
+    '2017-12-11': {'EUREON1Y': 1.0034820828274111, 'EUREON2Y': 1.0060486876190438,
+        'EUREON5Y': 0.998493831830445, 'EUREON10Y': 0.9414116493762762},
+    '2022-10-28': {'EUREON1Y': 1.0016316579708344, 'EUREON2Y': 1.007392091272912,
+        'EUREON5Y': 0.9117729999120614, 'EUREON10Y': 0.8063054817057665}
+}
+
+@pytest.fixture(scope='module')
+def bootstrapper(preprocessor):
+    return Bootstrap(preprocessor.preprocess_OIS_rates())
+
+@pytest.fixture(scope='module')
+def discount_factors(bootstrapper):
+    return bootstrapper.discount_factors().set_index('Date')
+
+@pytest.mark.parametrize('date', list(DISCOUNT_FACTORS))
+def test_discount_factors(discount_factors, date):
+    for pillar, expected in DISCOUNT_FACTORS[date].items():
+        assert discount_factors.loc[pd.Timestamp(date), pillar] == pytest.approx(expected,
+            rel=1e-12)
+
+def test_interpolate_unsorted_dates(bootstrapper):
+    # unsorted and duplicate dates, a Saturday (not bootstrapped) and a date before the curve
+    dates = pd.Series(pd.to_datetime(['2020-06-01', '2015-01-03', '2020-06-01', '2015-01-03',
+        '2012-12-31']))
+    expiries = pd.Series(pd.to_datetime(['2020-12-14', '2015-12-14', '2021-12-13', '2015-12-14',
+        '2013-12-16']))
+
+    rates = bootstrapper.interpolate(dates, expiries)['Risk Free Rate']
+
+    # each date uses the curve of the last bootstrapped date on or before it
+    lookup = bootstrapper.lookup()
+    for date, expiry, rate in zip(dates[:4], expiries[:4], rates[:4]):
+        year_fraction = np.asarray(yearfrac(date, expiry, 'ACT_365'))
+        assert rate == pytest.approx(lookup.interpolate(lookup.row(date), year_fraction), rel=1e-12)
+
+    assert rates[1] == rates[3]
+    assert np.isnan(rates[4])
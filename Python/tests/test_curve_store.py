@@ -0,0 +1,31 @@
+import os
+import numpy as np
+import pandas as pd
+
+from bootstrap import Bootstrap, CurveStore
+
+def test_failed_append_keeps_the_history(preprocessor, tmp_path, monkeypatch):
+    OIS_rates = preprocessor.preprocess_OIS_rates()
+    history, new_rows = OIS_rates.iloc[:-5], OIS_rates.iloc[-5:].reset_index(drop=True)
+
+    store = CurveStore(str(tmp_path))
+    bootstrapper = Bootstrap(history, store=store)
+
+    # fail the writes of the appended chunk (the full curves can still be saved)
+    save = np.save
+    def failing_save(file, values):
+        if file.endswith('.1.npy'):
+            raise OSError('disk full')
+        save(file, values)
+    monkeypatch.setattr(np, 'save', failing_save)
+
+    bootstrapper.append(new_rows)
+
+    # the history is back in the store, next to the full curves saved instead
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+    assert len(os.listdir(tmp_path)) == 2
+
+    monkeypatch.setattr(np, 'save', save)
+    for data in [history, OIS_rates]:
+        stored = Bootstrap(data, store=store).discount_factors()
+        pd.testing.assert_frame_equal(stored, Bootstrap(data).discount_factors())
@@ -0,0 +1,31 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+from yearfracion import yearfrac
+
+def test_scalar_datetime64():
+    out = yearfrac(np.datetime64('2020-01-01'), np.datetime64('2021-01-01'), 'ACT_365')
+    assert isinstance(out, float)
+    assert out == 366 / 365
+
+def test_scalar_timestamp_and_datetime64():
+    out = yearfrac(pd.Timestamp('2020-01-01'), np.datetime64('2020-07-01'), 'EU_30_360')
+    assert out == 0.5
+
+def test_scalar_missing_date():
+    assert np.isnan(yearfrac(np.datetime64('NaT'), np.datetime64('2020-07-01'), 'ACT_360'))
+
+def test_arrays_match_scalars():
+    first = np.array(['2020-01-31', '2021-02-28', 'NaT'], dtype='datetime64[ns]')
+    second = np.array(['2020-03-31', '2022-02-28', '2022-01-01'], dtype='datetime64[ns]')
+    out = yearfrac(first, second, 'EU_30_360')
+    for i in range(2):
+        expected = yearfrac(pd.Timestamp(first[i]).to_pydatetime(),
+            pd.Timestamp(second[i]).to_pydatetime(), 'EU_30_360')
+        assert out[i] == expected
+    assert np.isnan(out[2])
+
+def test_datetime_scalars():
+    out = yearfrac(datetime.datetime(2020, 1, 1), datetime.datetime(2021, 1, 1), 'ACT_365')
+    assert out == 366 / 365
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from bootstrap import Bootstrap, CurveLookup
+from spreads import Z_spread
+
+class LateCurve:
+    """
+    Bootstrapper whose curve starts after the first quoted prices of the bonds
+    """
+
+    def __init__(self, curve:CurveLookup, start:np.datetime64):
+        keep = curve.dates() >= start
+        self.__lookup = CurveLookup(curve.dates()[keep], curve.year_fractions()[keep],
+            curve.zero_rates()[keep])
+
+    def lookup(self)->CurveLookup:
+        return self.__lookup
+
+@pytest.fixture(scope='module')
+def data(preprocessor):
+    bootstrapper = Bootstrap(preprocessor.preprocess_OIS_rates())
+    bonds = preprocessor.preprocess_bonds()
+
+    return bonds, LateCurve(bootstrapper.lookup(), np.datetime64('2014-01-01'))
+
+def test_bond_price_before_curve(data):
+    bonds, late = data
+    bond = next(bond for bond in bonds.values() if bond.dates().min() < np.datetime64('2014-01-01'))
+    with pytest.raises(KeyError, match='before the start of the curve'):
+        bond.z_spread(late)
+
+def test_z_spread_price_before_curve(data):
+    bonds, late = data
+    with pytest.raises(KeyError, match='before the start of the curve'):
+        Z_spread(bonds, late).compute()
@@ -1,7 +1,11 @@
 import datetime
+import numpy as np
 import pandas as pd
 from typing import overload
 
+# number of nanoseconds in a day
+__NS_PER_DAY = 86_400_000_000_000
+
 @overload
 def yearfrac(first_date:pd.Series, second_date:datetime.datetime, convention:str)->pd.Series:
     pass
@@ -14,11 +18,18 @@ def yearfrac(first_date:datetime.datetime, second_date:pd.Series, convention:str
 def yearfrac(first_date:pd.Series, second_date:pd.Series, convention:str)->pd.Series:
     pass
 
-def yearfrac(first_date:datetime.datetime | pd.Series, second_date:datetime.datetime | pd.Series,
-    convention:str)->float:
+@overload
+def yearfrac(first_date:np.ndarray | datetime.datetime, second_date:np.ndarray | datetime.datetime,
+    convention:str)->np.ndarray:
+    pass
+
+def yearfrac(first_date:datetime.datetime | pd.Series | np.ndarray,
+    second_date:datetime.datetime | pd.Series | np.ndarray, convention:str)->float:
 
     """
-    Calculate the year fraction between two dates or two series of dates
+    Calculate the year fraction between two dates or two series of dates.
+    Series and numpy arrays of datetime64 are handled by a vectorized path, a scalar date is
+    broadcast against the other argument.
     """
 
     if isinstance(first_date, datetime.datetime) and isinstance(second_date, datetime.datetime):
@@ -26,35 +37,41 @@ def yearfrac(first_date:datetime.datetime | pd.Series, second_date:datetime.date
 
     if isinstance(first_date, pd.Series) and isinstance(second_date, datetime.datetime):
 
-        # create the output series with the same length as the input series
-        out = pd.Series(index=first_date.index)
-
-        for i in range(len(first_date)):
-            out.iloc[i] = __yearfrac(first_date.iloc[i], second_date, convention)
+        out = __yearfrac_array(__to_datetime64(first_date), __to_datetime64(second_date), convention)
 
-        return pd.Series(out)
+        return pd.Series(out, index=first_date.index)
 
     if isinstance(first_date, datetime.datetime) and isinstance(second_date, pd.Series):
-    
-        out = pd.Series(index=second_date.index)
 
-        for i in range(len(second_date)):
-            out.iloc[i] = __yearfrac(first_date, second_date.iloc[i], convention)
+        out = __yearfrac_array(__to_datetime64(first_date), __to_datetime64(second_date), convention)
 
-        return pd.Series(out)
+        return pd.Series(out, index=second_date.index)
 
     if isinstance(first_date, pd.Series) and isinstance(second_date, pd.Series):
 
         # check if the two series have the same length
         if len(first_date) != len(second_date):
             raise ValueError('The two series must have the same length')
-        
-        out = pd.Series(index=range(len(first_date)))
 
-        for i in range(len(first_date)):
-            out.iloc[i] = __yearfrac(first_date.iloc[i], second_date.iloc[i], convention)
+        out = __yearfrac_array(__to_datetime64(first_date), __to_datetime64(second_date), convention)
+
+        return pd.Series(out, index=range(len(first_date)))
+
+    # numpy arrays (possibly mixed with a scalar date) are broadcast against each other
+    return __yearfrac_array(__to_datetime64(first_date), __to_datetime64(second_date), convention)
+
+def __to_datetime64(dates:datetime.datetime | pd.Series | np.ndarray)->np.ndarray:
+    """
+    Convert a date or a collection of dates to a datetime64[ns] numpy array
+    """
+
+    if isinstance(dates, pd.Series):
+        return dates.to_numpy(dtype='datetime64[ns]')
 
-        return pd.Series(out)
+    if isinstance(dates, datetime.datetime):
+        return np.asarray(pd.Timestamp(dates).to_datetime64(), dtype='datetime64[ns]')
+
+    return np.asarray(dates, dtype='datetime64[ns]')
 
 def __yearfrac(first_date:datetime.datetime, second_date:datetime.datetime, convention:str)->float:
 
@@ -68,6 +85,29 @@ def __yearfrac(first_date:datetime.datetime, second_date:datetime.datetime, conv
     else:
         raise ValueError('Invalid convention')
 
+def __yearfrac_array(first_date:np.ndarray, second_date:np.ndarray, convention:str)->np.ndarray:
+    """
+    Vectorized year fraction between two datetime64[ns] arrays (broadcast against each other)
+    """
+
+    first_date, second_date = np.broadcast_arrays(first_date, second_date)
+
+    # get the convention
+    if convention.upper() == 'EU_30_360':
+        out = __EU_30_360_array(first_date, second_date)
+    elif convention.upper() == 'ACT_360':
+        out = __days_array(first_date, second_date) / 360
+    elif convention.upper() == 'ACT_365':
+        out = __days_array(first_date, second_date) / 365
+    else:
+        raise ValueError('Invalid convention')
+
+    # missing dates give a missing year fraction (out is 0-d for two scalar dates)
+    out = np.asarray(out, dtype=float)
+    out[np.isnat(first_date) | np.isnat(second_date)] = np.nan
+
+    # two scalar dates give a float back
+    return out[()]
 
 def __EU_30_360(first_date:datetime.datetime, second_date:datetime.datetime)->float:
     """
@@ -89,6 +129,45 @@ def __EU_30_360(first_date:datetime.datetime, second_date:datetime.datetime)->fl
     # calculate the year fraction
     return years + months / 12 + days / 360
 
+def __EU_30_360_array(first_date:np.ndarray, second_date:np.ndarray)->np.ndarray:
+    """
+    Calculate the year fraction with EU_30_360 convention on datetime64[ns] arrays
+    """
+
+    # split the dates into year, month and day
+    first_year, first_month, first_day = __split_dates(first_date)
+    second_year, second_month, second_day = __split_dates(second_date)
+
+    # move the 31st to the 30th
+    first_day = np.minimum(first_day, 30)
+    second_day = np.minimum(second_day, 30)
+
+    # calculate the year fraction
+    return (second_year - first_year) + (second_month - first_month) / 12 + \
+        (second_day - first_day) / 360
+
+def __split_dates(dates:np.ndarray)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split a datetime64 array into its year, month and day components
+    """
+
+    months = dates.astype('datetime64[M]')
+
+    year = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (dates.astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64) + 1
+
+    return year, month, day
+
+def __days_array(first_date:np.ndarray, second_date:np.ndarray)->np.ndarray:
+    """
+    Whole number of days between two datetime64[ns] arrays (floored as timedelta.days)
+    """
+
+    delta = second_date.astype(np.int64) - first_date.astype(np.int64)
+
+    return (delta // __NS_PER_DAY).astype(float)
+
 def __ACT_360(first_date:datetime.datetime, second_date:datetime.datetime)->float:
     """
     Calculate the year fraction with ACT_360 convention